@@ -36,7 +36,16 @@ CREATE TABLE IF NOT EXISTS app_list (
     registered_date TEXT NOT NULL
 );
 
+-- Rollup tables (period_usage_rollup, mv_app_usage_daily, rollup_state) and
+-- the app_usage triggers that invalidate them are defined in one place,
+-- mcp-server-app-usage/scheduler/precompute.py, which creates them on its
+-- first run
+
 -- Indexes for performance optimization
 CREATE INDEX IF NOT EXISTS idx_app_usage_user ON app_usage(user);
 CREATE INDEX IF NOT EXISTS idx_app_usage_date ON app_usage(log_date);
 CREATE INDEX IF NOT EXISTS idx_app_usage_app ON app_usage(application_name);
+CREATE INDEX IF NOT EXISTS idx_app_usage_app_plat_user ON app_usage(application_name, platform, user);
+CREATE INDEX IF NOT EXISTS idx_app_usage_app_plat_date_cover ON app_usage(application_name, platform, log_date, user, duration_seconds);
+CREATE INDEX IF NOT EXISTS idx_app_usage_app_date_user ON app_usage(application_name, log_date, user);
+CREATE INDEX IF NOT EXISTS idx_app_usage_date_user_app ON app_usage(log_date, user, application_name, platform, duration_seconds);
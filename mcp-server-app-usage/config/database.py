@@ -9,12 +9,18 @@ Created: 2025-01-08
 Last Modified: 2025-01-08
 """
 
+import asyncio
 import sqlite3
 import os
-from typing import Optional, Dict, Any
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List
 from contextlib import contextmanager
 import logging
 
+from config.settings import get_settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,6 +35,7 @@ class DatabaseConfig:
         db_path (str): Path to the SQLite database file
         timeout (int): Connection timeout in seconds
         check_same_thread (bool): SQLite thread safety setting
+        cached_statements (int): Prepared statements kept per pooled connection
     """
     
     def __init__(self, db_path: Optional[str] = None):
@@ -49,18 +56,31 @@ class DatabaseConfig:
             
         self.timeout = 30.0
         self.check_same_thread = False
+        # Tools build one SQL string per filter shape; keep all of them prepared
+        self.cached_statements = 256
         
         # Validate database file exists
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Database file not found: {self.db_path}")
     
-    def get_connection_params(self) -> Dict[str, Any]:
+    def get_connection_params(self, read_only: bool = False) -> Dict[str, Any]:
         """
         Get database connection parameters.
         
+        Args:
+            read_only (bool): Open the database through a read-only URI
+        
         Returns:
             dict: Dictionary containing connection parameters
         """
+        if read_only:
+            return {
+                'database': f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+                'uri': True,
+                'timeout': self.timeout,
+                'check_same_thread': self.check_same_thread,
+                'cached_statements': self.cached_statements
+            }
         return {
             'database': self.db_path,
             'timeout': self.timeout,
@@ -68,16 +88,136 @@ class DatabaseConfig:
         }
 
 
+# Pragmas applied once when a pooled (read-only) connection is opened
+CONNECTION_PRAGMAS = (
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped I/O
+    "PRAGMA cache_size=-65536",    # 64 MB page cache
+    "PRAGMA temp_store=MEMORY",    # sorter and DISTINCT b-trees stay in RAM
+    "PRAGMA query_only=1",         # also refuse writes through ATTACHed databases
+)
+
+# Pragmas applied to writable connections; journal_mode is persisted in the
+# database file, so the read-only pool picks up WAL as well
+WRITE_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+)
+
+# SQLite VM instructions between query budget checks
+PROGRESS_HANDLER_INTERVAL = 10000
+
+# One connection per (thread, database path); tool queries run on worker threads
+_thread_local = threading.local()
+_pool_lock = threading.Lock()
+_pooled_connections: List[sqlite3.Connection] = []
+
+
+def _apply_pragmas(connection: sqlite3.Connection, pragmas: tuple) -> None:
+    """
+    Apply connection pragmas, logging and skipping any that fail.
+    
+    Args:
+        connection (sqlite3.Connection): Connection to configure
+        pragmas (tuple): PRAGMA statements to execute
+    """
+    for pragma in pragmas:
+        try:
+            connection.execute(pragma)
+        except sqlite3.Error as e:
+            # e.g. WAL cannot be enabled on a read-only file; keep the defaults
+            logger.warning(f"Could not apply '{pragma}': {e}")
+
+
+def _open_pooled_connection(config: DatabaseConfig) -> sqlite3.Connection:
+    """
+    Open a new read-only connection for the pool and apply the connection pragmas.
+    
+    Args:
+        config (DatabaseConfig): Database configuration
+    
+    Returns:
+        sqlite3.Connection: Configured database connection
+    """
+    connection = sqlite3.connect(**config.get_connection_params(read_only=True))
+    connection.row_factory = sqlite3.Row  # Enable dict-like access to rows
+    _apply_pragmas(connection, CONNECTION_PRAGMAS)
+    
+    # Abort statements that run past the query_timeout budget set by
+    # get_database_connection (raises sqlite3.OperationalError: interrupted)
+    connection.set_progress_handler(_query_budget_exceeded, PROGRESS_HANDLER_INTERVAL)
+    
+    with _pool_lock:
+        _pooled_connections.append(connection)
+    
+    logger.debug(f"Pooled database connection opened: {config.db_path}")
+    return connection
+
+
+def _query_budget_exceeded() -> int:
+    """
+    SQLite progress handler; a non-zero return interrupts the running statement.
+    
+    Returns:
+        int: 1 if the calling thread's query deadline has passed, else 0
+    """
+    deadline = getattr(_thread_local, 'deadline', None)
+    return 1 if deadline is not None and time.monotonic() > deadline else 0
+
+
+def _get_pooled_connection(config: DatabaseConfig) -> sqlite3.Connection:
+    """
+    Get the calling thread's pooled connection, opening it on first use.
+    
+    Args:
+        config (DatabaseConfig): Database configuration
+    
+    Returns:
+        sqlite3.Connection: Pooled database connection
+    """
+    connections = getattr(_thread_local, 'connections', None)
+    if connections is None:
+        connections = _thread_local.connections = {}
+    
+    connection = connections.get(config.db_path)
+    if connection is None:
+        connection = connections[config.db_path] = _open_pooled_connection(config)
+    return connection
+
+
+def close_all_connections() -> None:
+    """
+    Close every pooled connection opened by any thread.
+    
+    Intended for server shutdown; threads that query afterwards must not
+    reuse their old connection.
+    """
+    with _pool_lock:
+        connections = list(_pooled_connections)
+        _pooled_connections.clear()
+    
+    for connection in connections:
+        try:
+            connection.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing pooled connection: {e}")
+    
+    logger.debug(f"Closed {len(connections)} pooled database connection(s)")
+
+
 @contextmanager
 def get_database_connection(config: Optional[DatabaseConfig] = None):
     """
     Context manager for database connections.
     
-    Provides a database connection with automatic cleanup and error handling.
-    Ensures connections are properly closed even if exceptions occur.
+    Yields a pooled read-only connection owned by the calling thread. The
+    connection is opened once, configured with CONNECTION_PRAGMAS, and kept
+    open across calls, so per-request connect and pragma setup costs are
+    avoided. Use get_writable_connection() for statements that modify data.
+    Uncommitted work is rolled back if an exception occurs. Statements run
+    inside the block are interrupted once the server's query_timeout elapses.
     
     Args:
-        config (DatabaseConfig, optional): Database configuration object
+        config (DatabaseConfig, optional): Database configuration
     
     Yields:
         sqlite3.Connection: Database connection object
@@ -92,13 +232,12 @@ def get_database_connection(config: Optional[DatabaseConfig] = None):
         ...     results = cursor.fetchall()
     """
     if config is None:
-        config = DatabaseConfig()
+        config = get_default_config()
     
     connection = None
     try:
-        connection = sqlite3.connect(**config.get_connection_params())
-        connection.row_factory = sqlite3.Row  # Enable dict-like access to rows
-        logger.debug(f"Database connection established: {config.db_path}")
+        connection = _get_pooled_connection(config)
+        _thread_local.deadline = time.monotonic() + get_settings().query_timeout
         yield connection
     except sqlite3.Error as e:
         logger.error(f"Database error: {e}")
@@ -110,10 +249,40 @@ def get_database_connection(config: Optional[DatabaseConfig] = None):
         if connection:
             connection.rollback()
         raise
+
+
+@contextmanager
+def get_writable_connection(config: Optional[DatabaseConfig] = None) -> Iterator[sqlite3.Connection]:
+    """
+    Context manager for a short-lived writable database connection.
+    
+    The connection is opened for the duration of the block, committed on
+    success, rolled back on error and always closed.
+    
+    Args:
+        config (DatabaseConfig, optional): Database configuration
+    
+    Yields:
+        sqlite3.Connection: Writable database connection
+    """
+    if config is None:
+        config = get_default_config()
+    
+    connection = None
+    try:
+        connection = sqlite3.connect(**config.get_connection_params())
+        connection.row_factory = sqlite3.Row
+        _apply_pragmas(connection, WRITE_CONNECTION_PRAGMAS)
+        yield connection
+        connection.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        if connection:
+            connection.rollback()
+        raise
     finally:
         if connection:
             connection.close()
-            logger.debug("Database connection closed")
 
 
 def execute_query(query: str, params: tuple = (), config: Optional[DatabaseConfig] = None) -> list:
@@ -148,6 +317,46 @@ def execute_query(query: str, params: tuple = (), config: Optional[DatabaseConfi
         return cursor.fetchall()
 
 
+async def execute_query_async(
+    query: str,
+    params: tuple = (),
+    config: Optional[DatabaseConfig] = None,
+    max_rows: Optional[int] = None
+) -> list:
+    """
+    Execute a SELECT query without blocking the event loop.
+    
+    The synchronous sqlite3 work runs in a worker thread via asyncio.to_thread,
+    so async tools can await it while other requests are being served.
+    
+    Args:
+        query (str): SQL query to execute
+        params (tuple): Query parameters for parameterized queries
+        config (DatabaseConfig, optional): Database configuration
+        max_rows (int, optional): Fetch at most this many rows in one batch
+    
+    Returns:
+        list: List of query results as sqlite3.Row objects
+    
+    Example:
+        >>> rows = await execute_query_async(
+        ...     "SELECT * FROM app_usage ORDER BY duration_seconds DESC LIMIT ?",
+        ...     (10,),
+        ...     max_rows=10
+        ... )
+    """
+    def _fetch() -> list:
+        with get_database_connection(config) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            if max_rows is None:
+                return cursor.fetchall()
+            cursor.arraysize = max_rows
+            return cursor.fetchmany(max_rows)
+    
+    return await asyncio.to_thread(_fetch)
+
+
 def execute_update(query: str, params: tuple = (), config: Optional[DatabaseConfig] = None) -> int:
     """
     Execute an INSERT, UPDATE, or DELETE query.
@@ -163,10 +372,9 @@ def execute_update(query: str, params: tuple = (), config: Optional[DatabaseConf
     Raises:
         DatabaseError: If query execution fails
     """
-    with get_database_connection(config) as conn:
+    with get_writable_connection(config) as conn:
         cursor = conn.cursor()
         cursor.execute(query, params)
-        conn.commit()
         return cursor.rowcount
 
 
@@ -185,6 +393,102 @@ def get_table_info(table_name: str, config: Optional[DatabaseConfig] = None) ->
     return execute_query(query, (), config)
 
 
+def get_database_mtime_ns(config: Optional[DatabaseConfig] = None) -> int:
+    """
+    Get the latest modification time of the database files.
+    
+    In WAL mode committed writes land in the -wal file and only reach the main
+    file at checkpoint, so both are considered. The value changes whenever the
+    database is written, which makes it usable as a cache invalidation token.
+    
+    Args:
+        config (DatabaseConfig, optional): Database configuration
+    
+    Returns:
+        int: Most recent st_mtime_ns of the database and its WAL file (0 if missing)
+    """
+    if config is None:
+        config = get_default_config()
+    
+    mtime_ns = 0
+    for path in (config.db_path, f"{config.db_path}-wal"):
+        try:
+            mtime_ns = max(mtime_ns, os.stat(path).st_mtime_ns)
+        except OSError:
+            pass
+    return mtime_ns
+
+
+# Indexes the analytics tools rely on beyond those created with the schema
+# (database/schema.sql); created idempotently at server startup
+PERFORMANCE_INDEXES = {
+    "idx_app_usage_app_plat_user": "app_usage(application_name, platform, user)",
+    # Covers the per-application aggregations (GROUP BY application_name,
+    # platform) in group order, so they need neither a sort nor table lookups
+    "idx_app_usage_app_plat_date_cover": "app_usage(application_name, platform, log_date, user, duration_seconds)",
+    # Date range seeks within one application across all platforms (app_users)
+    "idx_app_usage_app_date_user": "app_usage(application_name, log_date, user)",
+    # Covers the per-period aggregations (GROUP BY log_date) without table lookups
+    "idx_app_usage_date_user_app": "app_usage(log_date, user, application_name, platform, duration_seconds)",
+}
+
+
+def _planner_statistics_missing(conn: sqlite3.Connection) -> bool:
+    """
+    Check whether any performance index lacks sqlite_stat1 statistics.
+    
+    Args:
+        conn (sqlite3.Connection): Database connection
+    
+    Returns:
+        bool: True if ANALYZE has not covered every performance index
+    """
+    try:
+        analyzed = {row[0] for row in conn.execute("SELECT DISTINCT idx FROM sqlite_stat1")}
+    except sqlite3.OperationalError:
+        return True  # sqlite_stat1 does not exist until the first ANALYZE
+    return any(name not in analyzed for name in PERFORMANCE_INDEXES)
+
+
+def ensure_indexes(config: Optional[DatabaseConfig] = None) -> int:
+    """
+    Create any missing performance indexes and gather planner statistics.
+    
+    When a performance index has no sqlite_stat1 entry yet (first start or a
+    newly added index), a full ANALYZE is run. Without accurate statistics the
+    planner can pick a narrower, non-covering index for the GROUP BY log_date
+    aggregations; sampled statistics (analysis_limit) were skewed enough to do
+    exactly that. Statistics persist in the database file, so later starts
+    skip the ANALYZE.
+    
+    Failures (e.g. a read-only database file) are logged and skipped so the
+    server can still start; queries then fall back to the existing indexes.
+    
+    Args:
+        config (DatabaseConfig, optional): Database configuration
+    
+    Returns:
+        int: Number of index statements that executed successfully
+    """
+    created = 0
+    try:
+        with get_writable_connection(config) as conn:
+            for name, target in PERFORMANCE_INDEXES.items():
+                statement = f"CREATE INDEX IF NOT EXISTS {name} ON {target}"
+                try:
+                    conn.execute(statement)
+                    created += 1
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not ensure index ({statement}): {e}")
+            
+            if _planner_statistics_missing(conn):
+                logger.info("Gathering planner statistics (ANALYZE app_usage)")
+                _apply_pragmas(conn, ("ANALYZE app_usage",))
+    except sqlite3.Error as e:
+        logger.warning(f"Could not open database for index creation: {e}")
+    return created
+
+
 # Global database configuration instance
 _db_config = None
 
@@ -266,7 +266,7 @@ async def common_app_combinations(
         }
         
         logger.info(f"Successfully analyzed {len(combinations)} common app combinations")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in common_app_combinations: {e}")
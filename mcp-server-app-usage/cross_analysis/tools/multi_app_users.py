@@ -273,7 +273,7 @@ async def multi_app_users(
         }
         
         logger.info(f"Successfully analyzed {len(users)} multi-app users")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in multi_app_users: {e}")
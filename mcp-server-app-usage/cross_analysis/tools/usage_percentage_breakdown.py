@@ -333,7 +333,7 @@ async def usage_percentage_breakdown(
         }
         
         logger.info(f"Successfully analyzed usage percentage breakdown for {len(user_list)} users")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in usage_percentage_breakdown: {e}")
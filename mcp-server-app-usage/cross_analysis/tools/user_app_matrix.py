@@ -372,7 +372,7 @@ async def user_app_matrix(
         }
         
         logger.info(f"Successfully generated user-app matrix with {total_combinations} combinations")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in user_app_matrix: {e}")
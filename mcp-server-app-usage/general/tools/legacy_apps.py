@@ -90,12 +90,11 @@ async def legacy_apps(
             "legacy_applications": []
         }
         
-        total_usage_hours = 0
-        total_users = set()
+        # Summed in whole seconds once, rather than accumulating rounded-off hours per app
+        total_usage_hours = sum(app["total_seconds"] for app in result.data) / 3600
         
         for app in result.data:
             usage_hours = app["total_seconds"] / 3600
-            total_usage_hours += usage_hours
             
             app_info = {
                 "name": app["application_name"],
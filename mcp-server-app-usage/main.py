@@ -15,7 +15,7 @@ import logging
 
 # Import configuration
 from config.settings import get_settings, setup_logging
-from config.database import get_default_config
+from config.database import get_default_config, ensure_indexes, close_all_connections
 
 # Import the centralized MCP server instance
 from server_instance import mcp
@@ -63,6 +63,7 @@ def main():
         try:
             db_config = get_default_config()
             logger.info(f"Database path: {db_config.db_path}")
+            ensure_indexes(db_config)
         except Exception as e:
             logger.error(f"Database configuration error: {e}")
             raise
@@ -79,6 +80,7 @@ def main():
         logger.error(f"Server error: {e}", exc_info=True)
         raise
     finally:
+        close_all_connections()
         logger.info("MCP App Usage Analytics Server stopped")
 
 
@@ -0,0 +1,19 @@
+"""
+Scheduled maintenance jobs for MCP App Usage Analytics Server.
+
+This package contains batch jobs that are run outside the MCP server
+process (e.g. nightly from cron) to precompute data used by the tools.
+"""
+
+from .precompute import *
+
+__all__ = [
+    'ROLLUP_TABLE',
+    'APP_DAILY_ROLLUP_TABLE',
+    'ROLLUP_STATE_TABLE',
+    'PERIOD_EXPRESSIONS',
+    'build_period_rollups',
+    'build_app_usage_daily',
+    'build_all_rollups',
+    'rollup_is_current'
+]
@@ -0,0 +1,275 @@
+"""
+Nightly usage rollups for MCP App Usage Analytics Server.
+
+This module precomputes aggregates of app_usage so tools can read a few
+thousand rollup rows instead of aggregating every session on each call:
+
+- period_usage_rollup: the per-period totals reported by total_usage_period.
+  Each row is a GROUP BY over app_usage for one period type and one
+  (platform, application_name) combination, where '' stands for "all".
+- mv_app_usage_daily: per (application_name, platform, log_date) sums,
+  session counts, extremes and sum of squares, which re-aggregate exactly
+  over any date range (used by usage_time_stats and user_count_stats).
+
+Each build records a rollup_state row, and triggers on app_usage delete
+those rows on any INSERT, UPDATE or DELETE. Readers only use a rollup while
+its row is present, so any write since the last build makes the tools fall
+back to live aggregation until the next run.
+
+Usage (from the mcp-server-app-usage directory, e.g. nightly via cron):
+    python -m scheduler.precompute
+
+Author: MCP App Usage Analytics Team
+Created: 2025-01-09
+Last Modified: 2025-01-09
+"""
+
+import sqlite3
+import logging
+import time
+from typing import Optional
+
+from config.database import DatabaseConfig, get_default_config, get_writable_connection
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = "period_usage_rollup"
+APP_DAILY_ROLLUP_TABLE = "mv_app_usage_daily"
+ROLLUP_STATE_TABLE = "rollup_state"
+
+# Period key expression for each period type
+PERIOD_EXPRESSIONS = {
+    "daily": "log_date",
+    "weekly": "strftime('%Y-W%W', log_date)",
+    "monthly": "strftime('%Y-%m', log_date)",
+    "yearly": "strftime('%Y', log_date)",
+}
+
+# (platform, application_name) breakdowns; '' means all platforms/applications
+_DIMENSIONS = (
+    ("''", "''"),
+    ("platform", "''"),
+    ("''", "application_name"),
+    ("platform", "application_name"),
+)
+
+_CREATE_TABLES = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    period_type TEXT NOT NULL,
+    period TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    application_name TEXT NOT NULL,
+    total_seconds INTEGER NOT NULL,
+    unique_users INTEGER NOT NULL,
+    unique_apps INTEGER NOT NULL,
+    total_sessions INTEGER NOT NULL,
+    avg_session_seconds REAL NOT NULL,
+    min_session_seconds INTEGER NOT NULL,
+    max_session_seconds INTEGER NOT NULL,
+    PRIMARY KEY (period_type, platform, application_name, period)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS {APP_DAILY_ROLLUP_TABLE} (
+    application_name TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    log_date TEXT NOT NULL,
+    total_seconds INTEGER NOT NULL,
+    total_sessions INTEGER NOT NULL,
+    min_session_seconds INTEGER NOT NULL,
+    max_session_seconds INTEGER NOT NULL,
+    sum_sq_seconds INTEGER NOT NULL,
+    PRIMARY KEY (application_name, platform, log_date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS {ROLLUP_STATE_TABLE} (
+    rollup_name TEXT PRIMARY KEY,
+    source_max_id INTEGER,
+    built_at DATETIME DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS app_usage_insert_invalidates_rollups
+AFTER INSERT ON app_usage
+BEGIN
+    DELETE FROM {ROLLUP_STATE_TABLE};
+END;
+
+CREATE TRIGGER IF NOT EXISTS app_usage_update_invalidates_rollups
+AFTER UPDATE ON app_usage
+BEGIN
+    DELETE FROM {ROLLUP_STATE_TABLE};
+END;
+
+CREATE TRIGGER IF NOT EXISTS app_usage_delete_invalidates_rollups
+AFTER DELETE ON app_usage
+BEGIN
+    DELETE FROM {ROLLUP_STATE_TABLE};
+END;
+"""
+
+
+def _record_build(conn: sqlite3.Connection, rollup_name: str) -> None:
+    """
+    Record the app_usage rows a rollup was built from.
+
+    Must run in the same transaction as the rebuild, so no write to app_usage
+    can land between the aggregation and the recorded state.
+
+    Args:
+        conn (sqlite3.Connection): Writable connection inside the rebuild transaction
+        rollup_name (str): Rollup table name
+    """
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {ROLLUP_STATE_TABLE} (rollup_name, source_max_id, built_at)
+        SELECT ?, MAX(id), CURRENT_TIMESTAMP FROM app_usage
+    """, (rollup_name,))
+
+
+def build_period_rollups(config: Optional[DatabaseConfig] = None) -> int:
+    """
+    Rebuild the period usage rollups from app_usage.
+
+    The table is replaced in a single transaction, so readers either see the
+    previous rollups or the complete new set.
+
+    Args:
+        config (DatabaseConfig, optional): Database configuration
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    if config is None:
+        config = get_default_config()
+
+    start_time = time.perf_counter()
+    with get_writable_connection(config) as conn:
+        conn.executescript(_CREATE_TABLES)
+        conn.execute(f"DELETE FROM {ROLLUP_TABLE}")
+
+        row_count = 0
+        for period_type, period_expression in PERIOD_EXPRESSIONS.items():
+            for platform_column, application_column in _DIMENSIONS:
+                group_by = ", ".join(
+                    [period_expression]
+                    + [column for column in (platform_column, application_column) if column != "''"]
+                )
+                cursor = conn.execute(f"""
+                    INSERT INTO {ROLLUP_TABLE}
+                    SELECT
+                        ?,
+                        {period_expression},
+                        {platform_column},
+                        {application_column},
+                        SUM(duration_seconds),
+                        COUNT(DISTINCT user),
+                        COUNT(DISTINCT application_name),
+                        COUNT(*),
+                        AVG(duration_seconds),
+                        MIN(duration_seconds),
+                        MAX(duration_seconds)
+                    FROM app_usage
+                    GROUP BY {group_by}
+                """, (period_type,))
+                row_count += cursor.rowcount
+
+        _record_build(conn, ROLLUP_TABLE)
+
+    logger.info(
+        f"Built {row_count} period usage rollup rows in "
+        f"{(time.perf_counter() - start_time) * 1000:.0f} ms"
+    )
+    return row_count
+
+
+def build_app_usage_daily(config: Optional[DatabaseConfig] = None) -> int:
+    """
+    Rebuild the per application, platform and day rollup from app_usage.
+
+    Sums, session counts and sums of squares add up across days, so any
+    date range can be re-aggregated exactly, including the session standard
+    deviation. Distinct users do not, and are still counted from app_usage.
+
+    Args:
+        config (DatabaseConfig, optional): Database configuration
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    if config is None:
+        config = get_default_config()
+
+    start_time = time.perf_counter()
+    with get_writable_connection(config) as conn:
+        conn.executescript(_CREATE_TABLES)
+        conn.execute(f"DELETE FROM {APP_DAILY_ROLLUP_TABLE}")
+        cursor = conn.execute(f"""
+            INSERT INTO {APP_DAILY_ROLLUP_TABLE}
+            SELECT
+                application_name,
+                platform,
+                log_date,
+                SUM(duration_seconds),
+                COUNT(*),
+                MIN(duration_seconds),
+                MAX(duration_seconds),
+                SUM(duration_seconds * duration_seconds)
+            FROM app_usage
+            GROUP BY application_name, platform, log_date
+        """)
+        row_count = cursor.rowcount
+        _record_build(conn, APP_DAILY_ROLLUP_TABLE)
+
+    logger.info(
+        f"Built {row_count} daily application usage rollup rows in "
+        f"{(time.perf_counter() - start_time) * 1000:.0f} ms"
+    )
+    return row_count
+
+
+def build_all_rollups(config: Optional[DatabaseConfig] = None) -> int:
+    """
+    Rebuild every rollup table.
+
+    Args:
+        config (DatabaseConfig, optional): Database configuration
+
+    Returns:
+        int: Total number of rollup rows written
+    """
+    return build_period_rollups(config) + build_app_usage_daily(config)
+
+
+def rollup_is_current(conn: sqlite3.Connection, rollup_name: str = ROLLUP_TABLE) -> bool:
+    """
+    Check whether a rollup reflects the current app_usage rows.
+
+    The app_usage triggers delete a rollup's state row on any write, so its
+    presence means nothing changed since the build. MAX(id) is still compared
+    for state recorded by builds that predate the triggers. Both lookups are
+    single index probes, cheap enough to run on every tool call.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        rollup_name (str): Rollup table name (default: the period rollups)
+
+    Returns:
+        bool: True if the rollup exists and app_usage was not written since it was built
+    """
+    try:
+        state = conn.execute(
+            f"SELECT source_max_id FROM {ROLLUP_STATE_TABLE} WHERE rollup_name = ?", (rollup_name,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return False  # precompute has never run against this database
+
+    if state is None:
+        return False
+
+    current_max_id = conn.execute("SELECT MAX(id) FROM app_usage").fetchone()[0]
+    return state[0] == current_max_id
+
+
+if __name__ == "__main__":
+    from config.settings import get_settings, setup_logging
+
+    setup_logging(get_settings())
+    build_all_rollups()
@@ -21,6 +21,9 @@ __all__ = [
     
     # Database utilities
     'build_query',
+    'sample_stddev_sql',
+    'check_query_plan',
+    'MATERIALIZED',
     'execute_analytics_query',
     'validate_parameters',
     
@@ -29,10 +32,12 @@ __all__ = [
     'format_date',
     'get_date_range',
     'calculate_time_periods',
+    'parse_log_date',
     
     # Analytics utilities
     'calculate_percentages',
     'rank_results',
+    'quartile_from_rank',
     'aggregate_data',
     'format_duration'
 ]
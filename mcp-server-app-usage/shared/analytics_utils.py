@@ -119,6 +119,33 @@ def rank_results(
     return rankings
 
 
+def quartile_from_rank(rank: int, total: int) -> int:
+    """
+    Quartile of a ranked item, as NTILE(4) assigns it.
+    
+    Items are split into four buckets in ascending order of the ranked value,
+    with the first total % 4 buckets holding one extra item, so results sorted
+    highest first can be bucketed while they are streamed.
+    
+    Args:
+        rank (int): 1-based rank, highest value first
+        total (int): Number of ranked items
+    
+    Returns:
+        int: Quartile from 1 (lowest values) to 4 (highest values)
+    
+    Example:
+        >>> [quartile_from_rank(rank, 5) for rank in range(1, 6)]
+        [4, 3, 2, 1, 1]
+    """
+    position = total - rank  # 0-based, lowest value first
+    bucket_size, larger_buckets = divmod(total, 4)
+    larger_rows = larger_buckets * (bucket_size + 1)
+    if position < larger_rows:
+        return position // (bucket_size + 1) + 1
+    return larger_buckets + (position - larger_rows) // bucket_size + 1
+
+
 def aggregate_data(
     data: List[Dict[str, Any]], 
     group_by: str, 
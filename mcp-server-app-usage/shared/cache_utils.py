@@ -0,0 +1,146 @@
+"""
+Result caching utilities for MCP App Usage Analytics Server.
+
+This module provides a small in-process LRU cache with time-to-live
+expiry, used by tools to reuse fully built responses for repeated
+parameter combinations.
+
+Author: MCP App Usage Analytics Team
+Created: 2025-01-08
+Last Modified: 2025-01-09
+"""
+
+import pickle
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with per-entry time-to-live.
+
+    Entries are stored with their insertion time and evicted either when
+    they are older than the TTL or when the cache exceeds its maximum size
+    (least recently used first). Values are stored as a pickled snapshot and
+    unpickled on every hit, so callers can never mutate shared cached state;
+    for the nested response dicts the tools cache this is several times
+    faster than copy.deepcopy.
+
+    The cache honours the server's ``cache_enabled`` and ``cache_ttl``
+    settings (``MCP_APP_USAGE_CACHE_ENABLED`` / ``MCP_APP_USAGE_CACHE_TTL``)
+    unless an explicit TTL is given; a TTL of 0 disables caching.
+
+    Attributes:
+        name (str): Cache name used in log messages
+        maxsize (int): Maximum number of cached entries
+        hits (int): Lookups answered from the cache
+        misses (int): Lookups that found no live entry
+    """
+
+    def __init__(self, name: str, maxsize: int = 256, ttl: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            name (str): Cache name used in log messages
+            maxsize (int): Maximum number of cached entries (default: 256)
+            ttl (int, optional): Entry lifetime in seconds. Defaults to the
+                server's cache_ttl setting.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self._ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self) -> int:
+        """Effective time-to-live in seconds (0 when caching is disabled)."""
+        settings = get_settings()
+        if not settings.cache_enabled:
+            return 0
+        return settings.cache_ttl if self._ttl is None else self._ttl
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            Any: A copy of the cached value, or None on a miss or expired entry
+        """
+        ttl = self.ttl
+        if ttl <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, payload = entry
+            if time.monotonic() - stored_at > ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        logger.debug(f"{self.name} cache hit: {key}")
+        return pickle.loads(payload)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value in the cache.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Picklable value to cache (a snapshot is stored)
+        """
+        if self.ttl <= 0:
+            return
+
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache effectiveness.
+
+        Returns:
+            Dict[str, Any]: Entry count, hits, misses and hit rate (0-1)
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -12,19 +12,35 @@ Last Modified: 2025-01-08
 import sqlite3
 import time
 from typing import List, Dict, Any, Optional, Tuple, Union
-from config.database import get_database_connection, DatabaseConfig
+from config.database import get_database_connection, get_database_mtime_ns, execute_query_async, DatabaseConfig
 from .models import AnalyticsResult
+from .cache_utils import ResultCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Comparison operators accepted in build_query having conditions
+HAVING_OPERATORS = frozenset({"=", "!=", "<", "<=", ">", ">="})
+
+# CTE hint forcing a single evaluation of the CTE body. AS MATERIALIZED is
+# only understood from SQLite 3.35.0; older libraries get a plain CTE, which
+# they already materialize when it is referenced more than once
+MATERIALIZED = "MATERIALIZED" if sqlite3.sqlite_version_info >= (3, 35, 0) else ""
+
+# Query texts whose plan has already been checked by check_query_plan
+_checked_query_plans = set()
+
+# System-wide totals per filter combination, shared by every tool that needs them
+_usage_totals_cache = ResultCache("usage_totals", maxsize=128)
+
 
 def build_query(
     base_query: str,
     filters: Optional[Dict[str, Any]] = None,
     order_by: Optional[str] = None,
     limit: Optional[int] = None,
-    group_by: Optional[str] = None
+    group_by: Optional[str] = None,
+    having: Optional[Union[str, Dict[str, Tuple[str, Any]]]] = None
 ) -> Tuple[str, tuple]:
     """
     Build a SQL query with optional filters, ordering, and limiting.
@@ -38,10 +54,16 @@ def build_query(
         order_by (str, optional): ORDER BY clause
         limit (int, optional): LIMIT value
         group_by (str, optional): GROUP BY clause
+        having (str or dict, optional): HAVING clause, or a dictionary of
+            expression:(operator, value) conditions whose values are bound
+            as parameters, e.g. {"COUNT(DISTINCT user)": (">=", 5)}
     
     Returns:
         tuple: (complete_query, parameters_tuple)
     
+    Raises:
+        ValueError: If a having condition uses an unsupported operator
+    
     Example:
         >>> query, params = build_query(
         ...     "SELECT * FROM app_usage",
@@ -80,6 +102,19 @@ def build_query(
     if group_by:
         query_parts.append(f"GROUP BY {group_by}")
     
+    # Add HAVING clause; bound values keep the statement text (and its
+    # cached plan) the same across thresholds
+    if isinstance(having, str):
+        query_parts.append(f"HAVING {having}")
+    elif having:
+        having_conditions = []
+        for expression, (operator, value) in having.items():
+            if operator not in HAVING_OPERATORS:
+                raise ValueError(f"Unsupported HAVING operator: {operator}")
+            having_conditions.append(f"{expression} {operator} ?")
+            params.append(value)
+        query_parts.append("HAVING " + " AND ".join(having_conditions))
+    
     # Add ORDER BY clause
     if order_by:
         query_parts.append(f"ORDER BY {order_by}")
@@ -92,6 +127,74 @@ def build_query(
     return complete_query, tuple(params)
 
 
+def sample_stddev_sql(sum_expr: str, sum_sq_expr: str, count_expr: str) -> str:
+    """
+    Build a sample standard deviation expression from sufficient statistics.
+    
+    SQLite has no STDDEV aggregate; the sum, sum of squares and count add up
+    across groups, so the same expression works on raw rows and on
+    pre-aggregated rollups.
+    
+    Args:
+        sum_expr (str): SQL expression for the sum of values
+        sum_sq_expr (str): SQL expression for the sum of squared values
+        count_expr (str): SQL expression for the number of values
+    
+    Returns:
+        str: SQL expression (NULL for fewer than two values)
+    
+    Example:
+        >>> sample_stddev_sql("SUM(x)", "SUM(x * x)", "COUNT(x)")
+        'CASE WHEN COUNT(x) > 1 THEN SQRT(MAX((SUM(x * x) - SUM(x) * 1.0 * SUM(x) / COUNT(x)) / (COUNT(x) - 1), 0)) END'
+    """
+    return (
+        f"CASE WHEN {count_expr} > 1 THEN "
+        f"SQRT(MAX(({sum_sq_expr} - {sum_expr} * 1.0 * {sum_expr} / {count_expr}) / ({count_expr} - 1), 0)) "
+        f"END"
+    )
+
+
+def check_query_plan(
+    conn: sqlite3.Connection,
+    query: str,
+    params: Union[tuple, list] = (),
+    table: str = "app_usage"
+) -> bool:
+    """
+    Warn when a query reads a table with a full scan instead of an index.
+    
+    Each query text is checked once per process with EXPLAIN QUERY PLAN, so
+    tools can call this on every execution. A missing index or a planner
+    change after a schema or SQLite upgrade then shows up in the log
+    instead of as a silent slowdown.
+    
+    Args:
+        conn (sqlite3.Connection): Connection the query will run on
+        query (str): SQL query (built once per filter shape)
+        params (tuple or list): Query parameters
+        table (str): Table that must be read through an index (default: app_usage)
+    
+    Returns:
+        bool: False if a full table scan was found, True otherwise
+    """
+    if query in _checked_query_plans:
+        return True
+    _checked_query_plans.add(query)
+    
+    # Older SQLite versions report "SCAN TABLE t", newer ones "SCAN t"
+    full_scans = [
+        row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        if row[3].split()[:3] in (["SCAN", table], ["SCAN", "TABLE", table]) and "USING" not in row[3]
+    ]
+    if full_scans:
+        logger.warning(
+            f"Query plan reads {table} without an index ({'; '.join(full_scans)}); "
+            f"check that ensure_indexes has run. Query: {' '.join(query.split())[:200]}"
+        )
+        return False
+    return True
+
+
 def execute_analytics_query(
     query: str,
     params: tuple = (),
@@ -299,7 +402,7 @@ def build_aggregation_query(
     group_by: List[str],
     aggregations: Dict[str, str],
     filters: Optional[Dict[str, Any]] = None,
-    having: Optional[str] = None,
+    having: Optional[Union[str, Dict[str, Tuple[str, Any]]]] = None,
     order_by: Optional[str] = None,
     limit: Optional[int] = None
 ) -> Tuple[str, tuple]:
@@ -312,7 +415,8 @@ def build_aggregation_query(
         group_by (list): Fields to group by
         aggregations (dict): Aggregation functions {alias: expression}
         filters (dict, optional): WHERE clause filters
-        having (str, optional): HAVING clause
+        having (str or dict, optional): HAVING clause or bound conditions
+            (see build_query)
         order_by (str, optional): ORDER BY clause
         limit (int, optional): LIMIT value
     
@@ -341,6 +445,7 @@ def build_aggregation_query(
         base_query=base_query,
         filters=filters,
         group_by=', '.join(group_by) if group_by else None,
+        having=having,
         order_by=order_by,
         limit=limit
     )
@@ -378,3 +483,68 @@ def execute_batch_queries(queries: List[Tuple[str, tuple]], config: Optional[Dat
             ))
     
     return results
+
+
+def get_usage_totals(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    platform: Optional[str] = None,
+    application_name: Optional[str] = None,
+    config: Optional[DatabaseConfig] = None
+) -> Dict[str, Any]:
+    """
+    Get system-wide usage totals for a set of filters.
+    
+    The totals need a full scan of the filtered app_usage rows, so they are
+    cached per filter combination; tools asking for the same date range and
+    platform (e.g. several dashboard tiles) share one scan within the cache TTL.
+    The database modification time is part of the key, so any write makes
+    the next call recompute the totals.
+    
+    Args:
+        start_date (str, optional): Start date in database format (YYYY-MM-DD)
+        end_date (str, optional): End date in database format (YYYY-MM-DD)
+        platform (str, optional): Platform to filter by
+        application_name (str, optional): Application to filter by
+        config (DatabaseConfig, optional): Database configuration
+    
+    Returns:
+        dict: total_unique_users, grand_total_seconds, grand_total_sessions
+              and total_apps (distinct application/platform pairs)
+    """
+    cache_key = (start_date, end_date, platform, application_name, get_database_mtime_ns(config))
+    totals = _usage_totals_cache.get(cache_key)
+    if totals is not None:
+        return totals
+    
+    where_clause = "WHERE 1=1"
+    params = []
+    if start_date:
+        where_clause += " AND log_date >= ?"
+        params.append(start_date)
+    if end_date:
+        where_clause += " AND log_date <= ?"
+        params.append(end_date)
+    if platform:
+        where_clause += " AND platform = ?"
+        params.append(platform)
+    if application_name:
+        where_clause += " AND application_name = ?"
+        params.append(application_name)
+    
+    query = f"""
+    SELECT 
+        COUNT(DISTINCT user) as total_unique_users,
+        COALESCE(SUM(duration_seconds), 0) as grand_total_seconds,
+        COUNT(*) as grand_total_sessions,
+        COUNT(DISTINCT application_name || '|' || platform) as total_apps
+    FROM app_usage
+    {where_clause}
+    """
+    
+    with get_database_connection(config) as conn:
+        row = conn.execute(query, params).fetchone()
+    
+    totals = dict(row)
+    _usage_totals_cache.set(cache_key, totals)
+    return totals
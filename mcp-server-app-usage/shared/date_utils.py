@@ -10,6 +10,7 @@ Last Modified: 2025-01-08
 """
 
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import List, Tuple, Optional, Union
 import calendar
 
@@ -428,6 +429,9 @@ def validate_date_range(start_date: Optional[str], end_date: Optional[str]) -> d
     """
     Validate a date range and return validation result.
     
+    Validation is memoized per (start_date, end_date) pair, since dashboards
+    repeat the same ranges; each call still returns a new dict.
+    
     Args:
         start_date (str, optional): Start date string (YYYY-MM-DD)
         end_date (str, optional): End date string (YYYY-MM-DD)
@@ -440,39 +444,59 @@ def validate_date_range(start_date: Optional[str], end_date: Optional[str]) -> d
         >>> print(result)
         {'valid': True, 'message': 'Date range is valid'}
     """
+    valid, message = _validate_date_range(start_date, end_date)
+    return {"valid": valid, "message": message}
+
+
+@lru_cache(maxsize=512)
+def _validate_date_range(start_date: Optional[str], end_date: Optional[str]) -> Tuple[bool, str]:
+    """
+    Memoized validation behind validate_date_range.
+    
+    Args:
+        start_date (str, optional): Start date string (YYYY-MM-DD)
+        end_date (str, optional): End date string (YYYY-MM-DD)
+    
+    Returns:
+        Tuple[bool, str]: Whether the range is valid, and the message
+    """
     try:
         if start_date is None and end_date is None:
-            return {"valid": True, "message": "No date range specified"}
+            return (True, "No date range specified")
         
         if start_date is not None:
             try:
                 parse_date(start_date)
             except ValueError as e:
-                return {"valid": False, "message": f"Invalid start_date: {str(e)}"}
+                return (False, f"Invalid start_date: {str(e)}")
         
         if end_date is not None:
             try:
                 parse_date(end_date)
             except ValueError as e:
-                return {"valid": False, "message": f"Invalid end_date: {str(e)}"}
+                return (False, f"Invalid end_date: {str(e)}")
         
         if start_date is not None and end_date is not None:
             start_obj = parse_date(start_date)
             end_obj = parse_date(end_date)
             
             if start_obj > end_obj:
-                return {"valid": False, "message": "Start date cannot be after end date"}
+                return (False, "Start date cannot be after end date")
         
-        return {"valid": True, "message": "Date range is valid"}
+        return (True, "Date range is valid")
         
     except Exception as e:
-        return {"valid": False, "message": f"Date validation error: {str(e)}"}
+        return (False, f"Date validation error: {str(e)}")
 
 
+@lru_cache(maxsize=512)
 def format_date_for_db(date_string: str) -> str:
     """
     Format a date string for database storage (ensures YYYY-MM-DD format).
     
+    Results are memoized per input string. Inputs already in YYYY-MM-DD
+    form are only checked for calendar validity and returned unchanged.
+    
     Args:
         date_string (str): Date string to format
     
@@ -484,8 +508,36 @@ def format_date_for_db(date_string: str) -> str:
         >>> print(formatted)
         2024-01-15
     """
+    # Fast path: the common case is a date that is already in database format
+    if len(date_string) == 10 and date_string[4] == date_string[7] == "-":
+        try:
+            date.fromisoformat(date_string)
+            return date_string
+        except ValueError:
+            pass  # fall through for the detailed error message
+    
     try:
         date_obj = parse_date(date_string)
         return format_date(date_obj, "%Y-%m-%d")
     except ValueError as e:
         raise ValueError(f"Cannot format date for database: {str(e)}")
+
+
+@lru_cache(maxsize=4096)
+def parse_log_date(date_string: str) -> date:
+    """
+    Parse a YYYY-MM-DD date as stored in the log_date column.
+    
+    Result rows repeat a small set of dates, so parses are memoized, and
+    date.fromisoformat is several times faster than strptime.
+    
+    Args:
+        date_string (str): Date string in YYYY-MM-DD format
+    
+    Returns:
+        date: Parsed date object
+    
+    Raises:
+        ValueError: If the string is not a valid ISO date
+    """
+    return date.fromisoformat(date_string)
@@ -0,0 +1,3 @@
+"""
+Tests for MCP App Usage Analytics Server.
+"""
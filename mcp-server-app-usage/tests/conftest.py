@@ -0,0 +1,87 @@
+"""
+Shared pytest fixtures for MCP App Usage Analytics Server.
+
+Tests run against a small temporary database created from
+database/schema.sql, so they never touch the real app_usage.db.
+
+Author: MCP App Usage Analytics Team
+Created: 2025-01-10
+Last Modified: 2025-01-10
+"""
+
+import os
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+# Result caches would hide the writes some tests make between tool calls
+os.environ["MCP_APP_USAGE_CACHE_ENABLED"] = "false"
+
+from config import database
+from config.database import DatabaseConfig, close_all_connections
+
+SCHEMA_PATH = Path(__file__).resolve().parents[2] / "database" / "schema.sql"
+
+USERS = [f"user{index:02d}" for index in range(12)]
+APPLICATIONS = ["Chrome", "Excel", "Slack", "Teams", "VSCode"]
+PLATFORMS = ["Windows", "macOS"]
+
+
+def _sample_rows():
+    """Deterministic app_usage rows spread over January and February 2024."""
+    rows = []
+    start = date(2024, 1, 1)
+    for day in range(60):
+        log_date = (start + timedelta(days=day)).isoformat()
+        for index, user in enumerate(USERS):
+            if (day + index) % 3:
+                continue
+            application = APPLICATIONS[(day * 7 + index) % len(APPLICATIONS)]
+            platform = PLATFORMS[index % len(PLATFORMS)]
+            duration = 300 + (day * 37 + index * 113) % 7200
+            rows.append(("1.0.0", platform, user, application, "2.1", log_date, False, duration))
+    return rows
+
+
+def create_database(path: Path) -> Path:
+    """
+    Create a database from schema.sql and fill app_usage with sample rows.
+
+    Args:
+        path (Path): Database file to create
+
+    Returns:
+        Path: The database path
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SCHEMA_PATH.read_text())
+        conn.executemany("""
+            INSERT INTO app_usage (
+                monitor_app_version, platform, user, application_name,
+                application_version, log_date, legacy_app, duration_seconds
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, _sample_rows())
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+@pytest.fixture
+def db_config(tmp_path, monkeypatch):
+    """Temporary sample database, installed as the default configuration."""
+    config = DatabaseConfig(str(create_database(tmp_path / "app_usage.db")))
+    monkeypatch.setattr(database, "_db_config", config)
+    yield config
+    close_all_connections()
+
+
+@pytest.fixture
+def write_conn(db_config):
+    """Plain writable connection to the temporary database."""
+    conn = sqlite3.connect(db_config.db_path)
+    yield conn
+    conn.close()
@@ -0,0 +1,32 @@
+"""
+Tests for shared.analytics_utils.
+
+Author: MCP App Usage Analytics Team
+Created: 2025-01-10
+Last Modified: 2025-01-10
+"""
+
+import sqlite3
+
+import pytest
+
+from shared.analytics_utils import quartile_from_rank
+
+
+@pytest.mark.parametrize("total", range(1, 13))
+def test_quartile_from_rank_matches_ntile(total):
+    conn = sqlite3.connect(":memory:")
+    try:
+        # Distinct values, so the value v has rank total - v + 1 (highest first)
+        ntile = dict(conn.execute("""
+            WITH RECURSIVE ranked(v) AS (
+                SELECT 1 UNION ALL SELECT v + 1 FROM ranked WHERE v < ?
+            )
+            SELECT v, NTILE(4) OVER (ORDER BY v) FROM ranked
+        """, (total,)))
+    finally:
+        conn.close()
+
+    assert [quartile_from_rank(rank, total) for rank in range(1, total + 1)] == [
+        ntile[total - rank + 1] for rank in range(1, total + 1)
+    ]
@@ -0,0 +1,66 @@
+"""
+Tests for shared.database_utils.
+
+Author: MCP App Usage Analytics Team
+Created: 2025-01-10
+Last Modified: 2025-01-10
+"""
+
+import sqlite3
+import statistics
+
+import pytest
+
+from shared.database_utils import sample_stddev_sql
+
+SAMPLES = [
+    [1, 2, 3, 4],
+    [7, 7, 7],
+    [60, 3600],
+    [300, 1250, 4800, 960, 7199, 15],
+]
+
+
+@pytest.fixture
+def values_conn():
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("SELECT SQRT(4)")
+    except sqlite3.OperationalError:
+        conn.close()
+        pytest.skip("SQLite was built without math functions")
+    conn.execute("CREATE TABLE samples (sample INTEGER, x INTEGER)")
+    yield conn
+    conn.close()
+
+
+def _stddev(conn, values):
+    conn.execute("DELETE FROM samples")
+    conn.executemany("INSERT INTO samples VALUES (0, ?)", [(value,) for value in values])
+    expression = sample_stddev_sql("SUM(x)", "SUM(x * x)", "COUNT(x)")
+    return conn.execute(f"SELECT {expression} FROM samples").fetchone()[0]
+
+
+@pytest.mark.parametrize("values", SAMPLES)
+def test_sample_stddev_sql_matches_statistics(values_conn, values):
+    assert _stddev(values_conn, values) == pytest.approx(statistics.stdev(values))
+
+
+def test_sample_stddev_sql_over_pre_aggregated_groups(values_conn):
+    values_conn.executemany(
+        "INSERT INTO samples VALUES (?, ?)",
+        [(index, value) for index, values in enumerate(SAMPLES) for value in values],
+    )
+    expression = sample_stddev_sql("SUM(total)", "SUM(total_sq)", "SUM(n)")
+    stddev = values_conn.execute(f"""
+        SELECT {expression} FROM (
+            SELECT SUM(x) AS total, SUM(x * x) AS total_sq, COUNT(*) AS n
+            FROM samples GROUP BY sample
+        )
+    """).fetchone()[0]
+    assert stddev == pytest.approx(statistics.stdev(v for values in SAMPLES for v in values))
+
+
+@pytest.mark.parametrize("values", [[], [42]])
+def test_sample_stddev_sql_is_null_below_two_values(values_conn, values):
+    assert _stddev(values_conn, values) is None
@@ -0,0 +1,33 @@
+"""
+Tests for shared.date_utils.
+
+Author: MCP App Usage Analytics Team
+Created: 2025-01-10
+Last Modified: 2025-01-10
+"""
+
+import pytest
+
+from shared.date_utils import validate_date_range
+
+
+@pytest.mark.parametrize("start_date, end_date, valid", [
+    (None, None, True),
+    ("2024-01-01", "2024-01-31", True),
+    ("2024-02-01", "2024-01-31", False),
+    ("2024-13-01", None, False),
+    (None, "not-a-date", False),
+])
+def test_validate_date_range(start_date, end_date, valid):
+    assert validate_date_range(start_date, end_date)["valid"] is valid
+
+
+def test_validate_date_range_returns_fresh_dicts():
+    first = validate_date_range("2024-01-01", "2024-01-31")
+    first["valid"] = False
+    first["message"] = "changed by a caller"
+
+    assert validate_date_range("2024-01-01", "2024-01-31") == {
+        "valid": True,
+        "message": "Date range is valid",
+    }
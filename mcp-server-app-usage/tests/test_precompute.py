@@ -0,0 +1,99 @@
+"""
+Tests for the nightly rollups in scheduler.precompute.
+
+Author: MCP App Usage Analytics Team
+Created: 2025-01-10
+Last Modified: 2025-01-10
+"""
+
+import pytest
+
+from config.database import get_database_connection
+from scheduler.precompute import (
+    APP_DAILY_ROLLUP_TABLE,
+    ROLLUP_TABLE,
+    build_all_rollups,
+    rollup_is_current,
+)
+from usage_stats.tools.total_usage_period import total_usage_period
+from usage_stats.tools.usage_time_stats import usage_time_stats
+
+
+def _rollups_current():
+    with get_database_connection() as conn:
+        return rollup_is_current(conn, ROLLUP_TABLE), rollup_is_current(conn, APP_DAILY_ROLLUP_TABLE)
+
+
+async def _monthly_totals():
+    result = await total_usage_period(period_type="monthly")
+    assert result["status"] == "success"
+    return {
+        period["period"]: period["usage_metrics"]["total_hours"]
+        for period in result["data"]["periods"]
+    }
+
+
+def test_rollups_missing_before_first_build(db_config):
+    assert _rollups_current() == (False, False)
+
+
+def test_rollups_current_after_build(db_config):
+    build_all_rollups(db_config)
+    assert _rollups_current() == (True, True)
+
+
+@pytest.mark.parametrize("statement", [
+    "UPDATE app_usage SET duration_seconds = duration_seconds + 360000 WHERE id = 5",
+    "DELETE FROM app_usage WHERE id = 5",
+    """INSERT INTO app_usage (
+           monitor_app_version, platform, user, application_name,
+           application_version, log_date, legacy_app, duration_seconds
+       ) VALUES ('1.0.0', 'Windows', 'new.user', 'Excel', '2.1', '2024-01-02', 0, 60)""",
+])
+def test_any_write_invalidates_rollups(db_config, write_conn, statement):
+    build_all_rollups(db_config)
+    write_conn.execute(statement)
+    write_conn.commit()
+    assert _rollups_current() == (False, False)
+
+
+@pytest.mark.asyncio
+async def test_update_of_non_max_row_falls_back_to_app_usage(db_config, write_conn):
+    live_totals = await _monthly_totals()
+    build_all_rollups(db_config)
+    assert await _monthly_totals() == live_totals
+
+    write_conn.execute(
+        "UPDATE app_usage SET duration_seconds = duration_seconds + 360000 WHERE id = 5"
+    )
+    write_conn.commit()
+
+    totals = await _monthly_totals()
+    assert totals["2024-01"] == pytest.approx(live_totals["2024-01"] + 100, abs=0.01)
+    assert totals["2024-02"] == live_totals["2024-02"]
+
+    build_all_rollups(db_config)
+    assert _rollups_current() == (True, True)
+    assert await _monthly_totals() == totals
+
+
+@pytest.mark.asyncio
+async def test_update_falls_back_for_daily_rollup(db_config, write_conn):
+    async def january_applications():
+        result = await usage_time_stats(start_date="2024-01-01", end_date="2024-01-31")
+        assert result["status"] == "success"
+        return result["data"]["applications"]
+
+    live_applications = await january_applications()
+    build_all_rollups(db_config)
+    assert await january_applications() == live_applications
+
+    write_conn.execute(
+        "UPDATE app_usage SET duration_seconds = duration_seconds + 360000 WHERE id = 5"
+    )
+    write_conn.commit()
+
+    applications = await january_applications()
+    total_hours = sum(app["usage_metrics"]["total_hours"] for app in applications)
+    live_total_hours = sum(app["usage_metrics"]["total_hours"] for app in live_applications)
+    assert total_hours == pytest.approx(live_total_hours + 100, abs=0.1)
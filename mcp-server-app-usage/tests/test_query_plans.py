@@ -0,0 +1,63 @@
+"""
+Query plan tests for the indexes in database/schema.sql.
+
+Author: MCP App Usage Analytics Team
+Created: 2025-01-10
+Last Modified: 2025-01-10
+"""
+
+import logging
+
+import pytest
+
+from config.database import get_database_connection
+from shared import database_utils
+from shared.database_utils import check_query_plan
+from usage_stats.tools.total_usage_period import _build_query
+
+# (has_start_date, has_end_date, has_platform) and matching sample parameters
+DAILY_FILTERS = [
+    ((False, False, False), []),
+    ((True, True, False), ["2024-01-10", "2024-02-01"]),
+    ((True, False, True), ["2024-01-10", "Windows"]),
+]
+
+
+def _query_plan(query, params):
+    with get_database_connection() as conn:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+@pytest.fixture
+def unchecked_plans(monkeypatch):
+    """Forget which query plans check_query_plan has already checked."""
+    monkeypatch.setattr(database_utils, "_checked_query_plans", set())
+
+
+@pytest.mark.parametrize("include_distincts", [True, False])
+@pytest.mark.parametrize("filters, params", DAILY_FILTERS)
+def test_daily_totals_use_covering_index(db_config, filters, params, include_distincts):
+    query = _build_query("daily", *filters, False, include_distincts)
+    plan = _query_plan(query, params)
+
+    assert any(
+        "app_usage USING COVERING INDEX idx_app_usage_date_user_app" in step for step in plan
+    ), plan
+    assert "USE TEMP B-TREE FOR GROUP BY" not in plan
+
+
+def test_check_query_plan_accepts_index_reads(db_config, unchecked_plans, caplog):
+    query = _build_query("daily", True, True, False, False, True)
+    with get_database_connection() as conn, caplog.at_level(logging.WARNING):
+        assert check_query_plan(conn, query, ["2024-01-10", "2024-02-01"])
+    assert not caplog.records
+
+
+def test_check_query_plan_warns_once_on_full_scan(db_config, unchecked_plans, caplog):
+    query = "SELECT SUM(duration_seconds) FROM app_usage WHERE legacy_app = ?"
+    with get_database_connection() as conn, caplog.at_level(logging.WARNING):
+        assert not check_query_plan(conn, query, [0])
+        # Each query text is only checked once per process
+        assert check_query_plan(conn, query, [0])
+    assert len(caplog.records) == 1
+    assert "without an index" in caplog.records[0].getMessage()
@@ -0,0 +1,58 @@
+"""
+Tests for the user_count_stats tool.
+
+Author: MCP App Usage Analytics Team
+Created: 2025-01-10
+Last Modified: 2025-01-10
+"""
+
+import pytest
+
+from config.database import get_database_connection
+from scheduler.precompute import APP_DAILY_ROLLUP_TABLE, build_all_rollups, rollup_is_current
+from usage_stats.tools.user_count_stats import user_count_stats
+
+FILTERS = [
+    {},
+    {"start_date": "2024-01-10", "end_date": "2024-02-05"},
+    {"start_date": "2024-02-01"},
+    {"end_date": "2024-01-20", "platform": "macOS"},
+    {"platform": "Windows", "min_users": 3, "limit": 2},
+]
+
+
+async def _rows(**filters):
+    result = await user_count_stats(**filters)
+    assert result["status"] == "success"
+    data = result["data"]
+    data.pop("query_time_ms")
+    return data, result.get("insights")
+
+
+def _daily_rollup_current():
+    with get_database_connection() as conn:
+        return rollup_is_current(conn, APP_DAILY_ROLLUP_TABLE)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("filters", FILTERS)
+async def test_rollup_and_raw_paths_return_same_rows(db_config, filters):
+    assert not _daily_rollup_current()
+    raw = await _rows(**filters)
+    assert raw[0]["applications"]
+
+    build_all_rollups(db_config)
+    assert _daily_rollup_current()
+    assert await _rows(**filters) == raw
+
+
+@pytest.mark.asyncio
+async def test_stale_rollup_is_not_read(db_config, write_conn):
+    build_all_rollups(db_config)
+    write_conn.execute("UPDATE app_usage SET platform = 'Linux' WHERE id = 5")
+    write_conn.commit()
+    assert not _daily_rollup_current()
+
+    data, _ = await _rows(platform="Linux")
+    assert [app["platform"] for app in data["applications"]] == ["Linux"]
+    assert data["applications"][0]["engagement_metrics"]["total_sessions"] == 1
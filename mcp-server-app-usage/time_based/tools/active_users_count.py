@@ -322,7 +322,7 @@ async def active_users_count(
         }
         
         logger.info(f"Successfully analyzed active users across {len(periods)} {period_type} periods")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in active_users_count: {e}")
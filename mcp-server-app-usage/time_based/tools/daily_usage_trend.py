@@ -386,7 +386,7 @@ async def daily_usage_trend(
         }
         
         logger.info(f"Successfully analyzed daily usage trend for {application_name} across {len(daily_trends)} days")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in daily_usage_trend: {e}")
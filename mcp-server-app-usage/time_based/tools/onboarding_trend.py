@@ -361,7 +361,7 @@ async def onboarding_trend(
         }
         
         logger.info(f"Successfully analyzed onboarding trends for {len(applications)} applications")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in onboarding_trend: {e}")
@@ -354,7 +354,7 @@ async def peak_usage_hours(
         }
         
         logger.info(f"Successfully analyzed peak usage hours across {len(hourly_patterns)} hours")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in peak_usage_hours: {e}")
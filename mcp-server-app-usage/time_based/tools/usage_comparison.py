@@ -396,7 +396,7 @@ async def usage_comparison(
         }
         
         logger.info(f"Successfully compared usage for {len(comparisons)} applications between two periods")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in usage_comparison: {e}")
@@ -402,7 +402,7 @@ async def usage_trends(
         }
         
         logger.info(f"Successfully analyzed {period_type} usage trends across {len(trends)} periods")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in usage_trends: {e}")
@@ -352,7 +352,7 @@ async def average_usage_time(
         }
         
         logger.info(f"Successfully analyzed average usage time for {len(user_app_usage)} user-app combinations")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in average_usage_time: {e}")
@@ -365,7 +365,7 @@ async def platform_usage_stats(
         }
         
         logger.info(f"Successfully analyzed platform usage stats for {len(platform_list)} platforms")
-        return json.dumps(response_data, indent=2, ensure_ascii=False)
+        return json.dumps(response_data, ensure_ascii=False, separators=(',', ':'))
         
     except Exception as e:
         logger.error(f"Error in platform_usage_stats: {e}")
@@ -21,14 +21,13 @@ Created: 2025-01-08
 Last Modified: 2025-01-09
 """
 
-import json
 import logging
 from typing import Optional, Dict, Any
 from datetime import datetime
 
 # Import the mcp instance from server_instance module
 from server_instance import mcp
-from shared.database_utils import get_database_connection
+from shared.database_utils import execute_query_async
 from shared.date_utils import validate_date_range, format_date_for_db
 
 logger = logging.getLogger(__name__)
@@ -127,28 +126,16 @@ async def top_apps_by_usage(
             GROUP BY application_name, platform
             HAVING SUM(duration_seconds) >= ?
         ),
-        total_stats AS (
-            SELECT 
-                SUM(total_seconds) as grand_total_seconds,
-                SUM(unique_users) as grand_total_users,
-                SUM(total_sessions) as grand_total_sessions,
-                COUNT(*) as total_apps
-            FROM app_usage_stats
-        ),
         ranked_apps AS (
             SELECT 
                 aus.*,
-                ts.grand_total_seconds,
-                ts.grand_total_users,
-                ts.grand_total_sessions,
-                ts.total_apps,
-                ROUND((aus.total_seconds * 100.0 / ts.grand_total_seconds), 2) as usage_percentage,
-                ROUND((aus.unique_users * 100.0 / ts.grand_total_users), 2) as user_percentage,
-                ROW_NUMBER() OVER (ORDER BY aus.total_seconds DESC) as usage_rank,
-                ROW_NUMBER() OVER (ORDER BY aus.unique_users DESC) as user_rank,
-                ROW_NUMBER() OVER (ORDER BY aus.avg_session_seconds DESC) as engagement_rank
+                SUM(aus.total_seconds) OVER () as grand_total_seconds,
+                SUM(aus.unique_users) OVER () as grand_total_users,
+                SUM(aus.total_sessions) OVER () as grand_total_sessions,
+                COUNT(*) OVER () as total_apps
             FROM app_usage_stats aus
-            CROSS JOIN total_stats ts
+            ORDER BY aus.total_seconds DESC
+            LIMIT ?
         )
         SELECT 
             application_name,
@@ -161,29 +148,27 @@ async def top_apps_by_usage(
             max_session_seconds,
             first_usage_date,
             last_usage_date,
-            usage_percentage,
-            user_percentage,
-            usage_rank,
-            user_rank,
-            engagement_rank,
+            (SELECT COUNT(*) + 1 FROM app_usage_stats s
+             WHERE s.unique_users > ra.unique_users
+                OR (s.unique_users = ra.unique_users AND s.total_seconds > ra.total_seconds)) as user_rank,
+            (SELECT COUNT(*) + 1 FROM app_usage_stats s
+             WHERE s.avg_session_seconds > ra.avg_session_seconds
+                OR (s.avg_session_seconds = ra.avg_session_seconds AND s.total_seconds > ra.total_seconds)) as engagement_rank,
             grand_total_seconds,
             grand_total_users,
             grand_total_sessions,
             total_apps
-        FROM ranked_apps
+        FROM ranked_apps ra
         ORDER BY total_seconds DESC
-        LIMIT ?
         """
         
         params.extend([min_usage_seconds, top_n])
         
-        # Execute query
-        with get_database_connection() as conn:
-            cursor = conn.cursor()
-            start_time = datetime.now()
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            query_time = (datetime.now() - start_time).total_seconds() * 1000
+        # Execute query off the event loop so other tool calls are served meanwhile;
+        # the result size is bounded by LIMIT top_n, so fetch it in one sized batch
+        start_time = datetime.now()
+        results = await execute_query_async(query, tuple(params), max_rows=top_n)
+        query_time = (datetime.now() - start_time).total_seconds() * 1000
         
         if not results:
             return {
@@ -214,34 +199,40 @@ async def top_apps_by_usage(
         
         # Process results
         applications = []
-        total_usage_time = results[0][15] if results else 0  # grand_total_seconds
-        total_users = results[0][16] if results else 0  # grand_total_users
-        total_sessions = results[0][17] if results else 0  # grand_total_sessions
-        total_apps_in_db = results[0][18] if results else 0  # total_apps
+        total_usage_time = results[0][12] if results else 0  # grand_total_seconds
+        total_users = results[0][13] if results else 0  # grand_total_users
+        total_sessions = results[0][14] if results else 0  # grand_total_sessions
+        total_apps_in_db = results[0][15] if results else 0  # total_apps
+        
+        high_engagement_count = 0
+        multi_user_count = 0
         
-        for row in results:
+        # Rows arrive ordered by total_seconds, so the usage rank is the position;
+        # shares are only computed for the top_n rows actually returned
+        for usage_rank, row in enumerate(results, start=1):
             app_data = {
-                "rank": int(row[12]),  # usage_rank
+                "rank": usage_rank,
                 "application_name": row[0],
                 "platform": row[1],
                 "usage_metrics": {
                     "total_hours": round(row[2] / 3600, 2),  # total_seconds to hours
                     "total_minutes": round(row[2] / 60, 2),  # total_seconds to minutes
-                    "usage_percentage": row[10],  # usage_percentage
-                    "market_share_rank": int(row[12])  # usage_rank
+                    "usage_percentage": round(row[2] * 100.0 / total_usage_time, 2) if total_usage_time else None,
+                    "market_share_rank": usage_rank
                 },
                 "user_metrics": {
                     "unique_users": int(row[3]),
-                    "user_percentage": row[11],  # user_percentage
-                    "user_popularity_rank": int(row[13])  # user_rank
+                    "user_percentage": round(row[3] * 100.0 / total_users, 2) if total_users else None,
+                    "user_popularity_rank": int(row[10])  # user_rank
                 },
                 "session_metrics": {
                     "total_sessions": int(row[4]),
                     "avg_session_minutes": round(row[5] / 60, 2),  # avg_session_seconds to minutes
                     "min_session_minutes": round(row[6] / 60, 2),  # min_session_seconds to minutes
                     "max_session_minutes": round(row[7] / 60, 2),  # max_session_seconds to minutes
-                    "sessions_per_user": round(row[4] / row[3], 2) if row[3] > 0 else 0,
-                    "engagement_rank": int(row[14])  # engagement_rank
+                    # Groups always have at least one user; `or 1` only guards the divisor
+                    "sessions_per_user": round(row[4] / (row[3] or 1), 2),
+                    "engagement_rank": int(row[11])  # engagement_rank
                 },
                 "timeline": {
                     "first_usage_date": row[8],
@@ -251,6 +242,12 @@ async def top_apps_by_usage(
                 }
             }
             applications.append(app_data)
+            
+            # Tally recommendation counters while the row is at hand
+            if app_data['session_metrics']['avg_session_minutes'] > 30:
+                high_engagement_count += 1
+            if app_data['user_metrics']['unique_users'] > 10:
+                multi_user_count += 1
         
         # Generate insights
         top_app = applications[0] if applications else None
@@ -288,14 +285,11 @@ async def top_apps_by_usage(
                     insights["recommendations"].append("Usage is well-distributed across applications - good diversity")
         
         # Usage pattern recommendations
-        if applications:
-            high_engagement_apps = [app for app in applications if app['session_metrics']['avg_session_minutes'] > 30]
-            if high_engagement_apps:
-                insights["recommendations"].append(f"Focus on {len(high_engagement_apps)} high-engagement applications (>30 min avg sessions)")
-            
-            multi_user_apps = [app for app in applications if app['user_metrics']['unique_users'] > 10]
-            if multi_user_apps:
-                insights["recommendations"].append(f"Prioritize {len(multi_user_apps)} applications with broad user adoption (>10 users)")
+        if high_engagement_count:
+            insights["recommendations"].append(f"Focus on {high_engagement_count} high-engagement applications (>30 min avg sessions)")
+        
+        if multi_user_count:
+            insights["recommendations"].append(f"Prioritize {multi_user_count} applications with broad user adoption (>10 users)")
         
         return {
             "status": "success",
@@ -12,6 +12,7 @@ Parameters:
     - end_date (str, optional): End date for analysis (YYYY-MM-DD format)
     - platform (str, optional): Platform to filter by
     - min_users (int, optional): Minimum user count to include applications
+    - include_session_extremes (bool, optional): Include min/max session lengths (default: False)
 
 Returns:
     - Ranked applications by unique user count with detailed analytics and insights
@@ -21,18 +22,204 @@ Created: 2025-01-08
 Last Modified: 2025-01-09
 """
 
-import json
 import logging
+import sqlite3
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from datetime import datetime
 
 # Import the mcp instance from server_instance module
 from server_instance import mcp
-from shared.database_utils import get_database_connection
+from shared.database_utils import get_database_connection, get_database_mtime_ns, get_usage_totals
 from shared.date_utils import validate_date_range, format_date_for_db
+from shared.cache_utils import ResultCache
 
 logger = logging.getLogger(__name__)
 
+# Responses for repeated parameter combinations (e.g. dashboard refreshes)
+_result_cache = ResultCache("top_apps_by_users", maxsize=256)
+
+
+@lru_cache(maxsize=32)
+def _build_query(
+    has_start_date: bool,
+    has_end_date: bool,
+    has_platform: bool,
+    include_session_extremes: bool,
+    filters_by_min_users: bool
+) -> str:
+    """
+    Assemble the ranking SQL for a given filter shape.
+    
+    The text only depends on which filters are present, so it is built once per
+    shape and the identical string lets sqlite3's statement cache reuse the
+    prepared statement. Parameters must be bound in the order start_date,
+    end_date, platform, then min_users and the same filters again when
+    filters_by_min_users is set, then top_n.
+    
+    Args:
+        has_start_date: Whether a start_date filter is applied
+        has_end_date: Whether an end_date filter is applied
+        has_platform: Whether a platform filter is applied
+        include_session_extremes: Whether to aggregate min/max session lengths
+        filters_by_min_users: Whether min_users can exclude any application
+    
+    Returns:
+        The ranking query
+    """
+    where_clause = "WHERE 1=1"
+    if has_start_date:
+        where_clause += " AND log_date >= ?"
+    if has_end_date:
+        where_clause += " AND log_date <= ?"
+    if has_platform:
+        where_clause += " AND platform = ?"
+    
+    # MIN/MAX add two aggregator states per group, so only compute them on request
+    extremes_aggregates = ""
+    extremes_columns = ""
+    if include_session_extremes:
+        extremes_aggregates = """
+            MIN(duration_seconds) as min_session_seconds,
+            MAX(duration_seconds) as max_session_seconds,"""
+        extremes_columns = """
+        ROUND(min_session_seconds / 60.0, 2) as min_session_minutes,
+        ROUND(max_session_seconds / 60.0, 2) as max_session_minutes,"""
+    
+    if filters_by_min_users:
+        # Narrow pass (served by idx_app_usage_app_plat_user) that drops apps
+        # below min_users before the heavy aggregation runs; the filter is
+        # applied to both the qualifying pass and the aggregation
+        app_stats_cte = f"""
+    WITH qualified_apps AS (
+        SELECT 
+            application_name,
+            platform,
+            COUNT(DISTINCT user) as unique_users
+        FROM app_usage
+        {where_clause}
+        GROUP BY application_name, platform
+        HAVING COUNT(DISTINCT user) >= ?
+    ),
+    app_user_stats AS (
+        SELECT 
+            application_name,
+            platform,
+            q.unique_users,
+            SUM(duration_seconds) as total_seconds,
+            COUNT(*) as total_sessions,{extremes_aggregates}
+            MIN(log_date) as first_usage_date,
+            MAX(log_date) as last_usage_date,
+            COUNT(DISTINCT log_date) as active_days
+        FROM app_usage
+        JOIN qualified_apps q USING (application_name, platform)
+        {where_clause}
+        GROUP BY application_name, platform
+    )"""
+    else:
+        # min_users of 1 keeps every application, so aggregate in a single pass
+        app_stats_cte = f"""
+    WITH app_user_stats AS (
+        SELECT 
+            application_name,
+            platform,
+            COUNT(DISTINCT user) as unique_users,
+            SUM(duration_seconds) as total_seconds,
+            COUNT(*) as total_sessions,{extremes_aggregates}
+            MIN(log_date) as first_usage_date,
+            MAX(log_date) as last_usage_date,
+            COUNT(DISTINCT log_date) as active_days
+        FROM app_usage
+        {where_clause}
+        GROUP BY application_name, platform
+    )"""
+    
+    query = app_stats_cte + f"""
+    SELECT 
+        application_name,
+        platform,
+        unique_users,
+        total_seconds,
+        total_sessions,
+        -- Derived from the SUM/COUNT accumulators instead of a separate AVG()
+        total_seconds * 1.0 / NULLIF(total_sessions, 0) as avg_session_seconds,
+        first_usage_date,
+        last_usage_date,
+        active_days,
+        CAST(julianday(last_usage_date) - julianday(first_usage_date) AS INTEGER) + 1 as days_since_first_use,
+        -- Unit conversions are done here so rows arrive ready to report
+        ROUND(total_seconds / 3600.0, 2) as total_hours,
+        ROUND(total_seconds / 60.0, 2) as total_minutes,
+        ROUND(total_seconds * 1.0 / NULLIF(total_sessions, 0) / 60.0, 2) as avg_session_minutes,{extremes_columns}
+        ROUND((total_seconds / unique_users) / 3600.0, 2) as avg_usage_per_user_hours,
+        ROUND((total_sessions / unique_users), 2) as avg_sessions_per_user
+    FROM app_user_stats
+    ORDER BY unique_users DESC
+    LIMIT ?
+    """
+    
+    return query
+
+
+def _build_application(
+    row: sqlite3.Row,
+    user_rank: int,
+    usage_rank: int,
+    engagement_rank: int,
+    total_unique_users: int,
+    grand_total_seconds: int,
+    include_session_extremes: bool
+) -> Dict[str, Any]:
+    """
+    Build the response entry for one ranked application row.
+    
+    Args:
+        row: Result row from the ranking query (accessed by column name)
+        user_rank: Position by unique users
+        usage_rank: Position by total usage time among the returned rows
+        engagement_rank: Position by average session length among the returned rows
+        total_unique_users: Distinct users across all applications in scope
+        grand_total_seconds: Total usage seconds across all applications in scope
+        include_session_extremes: Whether the row carries min/max session columns
+    
+    Returns:
+        Dict with user, usage, session and timeline metrics for the application
+    """
+    unique_users = row["unique_users"]
+    total_seconds = row["total_seconds"]
+    
+    return {
+        "rank": user_rank,
+        "application_name": row["application_name"],
+        "platform": row["platform"],
+        "user_metrics": {
+            "unique_users": int(unique_users),
+            "user_penetration_percentage": round(unique_users * 100.0 / total_unique_users, 2),
+            "user_popularity_rank": user_rank,
+            "avg_usage_per_user_hours": row["avg_usage_per_user_hours"],
+            "avg_sessions_per_user": row["avg_sessions_per_user"]
+        },
+        "usage_metrics": {
+            "total_hours": row["total_hours"],
+            "total_minutes": row["total_minutes"],
+            "usage_share_percentage": round(total_seconds * 100.0 / grand_total_seconds, 2),
+            "usage_intensity_rank": usage_rank
+        },
+        "session_metrics": {
+            "total_sessions": int(row["total_sessions"]),
+            "avg_session_minutes": row["avg_session_minutes"],
+            "min_session_minutes": row["min_session_minutes"] if include_session_extremes else None,
+            "max_session_minutes": row["max_session_minutes"] if include_session_extremes else None,
+            "engagement_rank": engagement_rank
+        },
+        "timeline": {
+            "first_usage_date": row["first_usage_date"],
+            "last_usage_date": row["last_usage_date"],
+            "active_days": int(row["active_days"]),
+            "days_since_first_use": row["days_since_first_use"]
+        }
+    }
+
 
 @mcp.tool()
 async def top_apps_by_users(
@@ -40,7 +227,8 @@ async def top_apps_by_users(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     platform: Optional[str] = None,
-    min_users: Optional[int] = None
+    min_users: Optional[int] = None,
+    include_session_extremes: bool = False
 ) -> Dict[str, Any]:
     """
     Rank applications by number of unique users with comprehensive analytics.
@@ -58,6 +246,7 @@ async def top_apps_by_users(
         end_date: End date for analysis (YYYY-MM-DD format)
         platform: Platform to filter by (e.g., 'Windows', 'macOS', 'Linux')
         min_users: Minimum number of unique users to include applications
+        include_session_extremes: Include min/max session lengths per application (default: False)
     
     Returns:
         Dict containing ranked applications with user adoption analytics and insights
@@ -89,110 +278,40 @@ async def top_apps_by_users(
         top_n = top_n or 10
         min_users = min_users or 1
         
-        # Build query with CTEs for comprehensive analysis
-        query = """
-        WITH app_user_stats AS (
-            SELECT 
-                application_name,
-                platform,
-                COUNT(DISTINCT user) as unique_users,
-                SUM(duration_seconds) as total_seconds,
-                COUNT(*) as total_sessions,
-                AVG(duration_seconds) as avg_session_seconds,
-                MIN(duration_seconds) as min_session_seconds,
-                MAX(duration_seconds) as max_session_seconds,
-                MIN(log_date) as first_usage_date,
-                MAX(log_date) as last_usage_date,
-                COUNT(DISTINCT log_date) as active_days
-            FROM app_usage
-            WHERE 1=1
-        """
+        # The database modification time invalidates cached responses on writes
+        cache_key = (top_n, start_date, end_date, platform, min_users, include_session_extremes,
+                     get_database_mtime_ns())
+        cached_response = _result_cache.get(cache_key)
+        if cached_response is not None:
+            return cached_response
         
-        params = []
-        
-        # Add date filters
+        # Build the filter parameters in the canonical order used by _build_query
+        filter_params = []
         if start_date:
-            query += " AND log_date >= ?"
-            params.append(format_date_for_db(start_date))
-        
+            filter_params.append(format_date_for_db(start_date))
         if end_date:
-            query += " AND log_date <= ?"
-            params.append(format_date_for_db(end_date))
-        
-        # Add platform filter
+            filter_params.append(format_date_for_db(end_date))
         if platform:
-            query += " AND platform = ?"
-            params.append(platform)
+            filter_params.append(platform)
         
-        query += """
-            GROUP BY application_name, platform
-            HAVING COUNT(DISTINCT user) >= ?
-        ),
-        total_stats AS (
-            SELECT 
-                COUNT(DISTINCT user) as total_unique_users,
-                SUM(total_seconds) as grand_total_seconds,
-                SUM(total_sessions) as grand_total_sessions,
-                COUNT(*) as total_apps
-            FROM (
-                SELECT user, SUM(total_seconds) as total_seconds, SUM(total_sessions) as total_sessions
-                FROM app_user_stats
-                GROUP BY user
-            )
-        ),
-        user_engagement_stats AS (
-            SELECT 
-                aus.*,
-                ts.total_unique_users,
-                ts.grand_total_seconds,
-                ts.grand_total_sessions,
-                ts.total_apps,
-                ROUND((aus.unique_users * 100.0 / ts.total_unique_users), 2) as user_penetration_percentage,
-                ROUND((aus.total_seconds * 100.0 / ts.grand_total_seconds), 2) as usage_share_percentage,
-                ROUND((aus.total_seconds / aus.unique_users), 2) as avg_usage_per_user_seconds,
-                ROUND((aus.total_sessions / aus.unique_users), 2) as avg_sessions_per_user,
-                ROW_NUMBER() OVER (ORDER BY aus.unique_users DESC) as user_rank,
-                ROW_NUMBER() OVER (ORDER BY aus.total_seconds DESC) as usage_rank,
-                ROW_NUMBER() OVER (ORDER BY aus.avg_session_seconds DESC) as engagement_rank
-            FROM app_user_stats aus
-            CROSS JOIN total_stats ts
+        filters_by_min_users = min_users > 1
+        query = _build_query(
+            bool(start_date), bool(end_date), bool(platform), bool(include_session_extremes),
+            filters_by_min_users
         )
-        SELECT 
-            application_name,
-            platform,
-            unique_users,
-            total_seconds,
-            total_sessions,
-            avg_session_seconds,
-            min_session_seconds,
-            max_session_seconds,
-            first_usage_date,
-            last_usage_date,
-            active_days,
-            user_penetration_percentage,
-            usage_share_percentage,
-            avg_usage_per_user_seconds,
-            avg_sessions_per_user,
-            user_rank,
-            usage_rank,
-            engagement_rank,
-            total_unique_users,
-            grand_total_seconds,
-            grand_total_sessions,
-            total_apps
-        FROM user_engagement_stats
-        ORDER BY unique_users DESC
-        LIMIT ?
-        """
-        
-        params.extend([min_users, top_n])
+        if filters_by_min_users:
+            params = filter_params + [min_users] + filter_params + [top_n]
+        else:
+            params = filter_params + [top_n]
         
         # Execute query
         with get_database_connection() as conn:
             cursor = conn.cursor()
             start_time = datetime.now()
             cursor.execute(query, params)
-            results = cursor.fetchall()
+            # Result size is bounded by LIMIT top_n, so fetch it in one sized batch
+            cursor.arraysize = top_n
+            results = cursor.fetchmany(top_n)
             query_time = (datetime.now() - start_time).total_seconds() * 1000
         
         if not results:
@@ -206,7 +325,8 @@ async def top_apps_by_users(
                         "start_date": start_date,
                         "end_date": end_date,
                         "platform": platform,
-                        "min_users": min_users
+                        "min_users": min_users,
+                        "include_session_extremes": include_session_extremes
                     },
                     "query_time_ms": round(query_time, 2),
                     "total_records": 0,
@@ -223,50 +343,47 @@ async def top_apps_by_users(
             }
         
         # Process results
-        applications = []
-        total_unique_users = results[0][18] if results else 0
-        grand_total_seconds = results[0][19] if results else 0
-        grand_total_sessions = results[0][20] if results else 0
-        total_apps_in_db = results[0][21] if results else 0
+        # System-wide totals are a single row, fetched separately rather than
+        # repeated on every returned application row, and shared across tools
+        totals = get_usage_totals(
+            format_date_for_db(start_date) if start_date else None,
+            format_date_for_db(end_date) if end_date else None,
+            platform
+        )
+        total_unique_users = totals["total_unique_users"]
+        grand_total_seconds = totals["grand_total_seconds"]
+        grand_total_sessions = totals["grand_total_sessions"]
+        total_apps_in_db = totals["total_apps"]
         
-        for row in results:
-            app_data = {
-                "rank": int(row[15]),  # user_rank
-                "application_name": row[0],
-                "platform": row[1],
-                "user_metrics": {
-                    "unique_users": int(row[2]),
-                    "user_penetration_percentage": row[11],  # user_penetration_percentage
-                    "user_popularity_rank": int(row[15]),  # user_rank
-                    "avg_usage_per_user_hours": round(row[13] / 3600, 2),  # avg_usage_per_user_seconds to hours
-                    "avg_sessions_per_user": round(row[14], 2)  # avg_sessions_per_user
-                },
-                "usage_metrics": {
-                    "total_hours": round(row[3] / 3600, 2),  # total_seconds to hours
-                    "total_minutes": round(row[3] / 60, 2),  # total_seconds to minutes
-                    "usage_share_percentage": row[12],  # usage_share_percentage
-                    "usage_intensity_rank": int(row[16])  # usage_rank
-                },
-                "session_metrics": {
-                    "total_sessions": int(row[4]),
-                    "avg_session_minutes": round(row[5] / 60, 2),  # avg_session_seconds to minutes
-                    "min_session_minutes": round(row[6] / 60, 2),  # min_session_seconds to minutes
-                    "max_session_minutes": round(row[7] / 60, 2),  # max_session_seconds to minutes
-                    "engagement_rank": int(row[17])  # engagement_rank
-                },
-                "timeline": {
-                    "first_usage_date": row[8],
-                    "last_usage_date": row[9],
-                    "active_days": int(row[10]),
-                    "days_since_first_use": (datetime.strptime(row[9], '%Y-%m-%d') - 
-                                           datetime.strptime(row[8], '%Y-%m-%d')).days + 1
-                }
-            }
-            applications.append(app_data)
+        # Rank the returned rows in Python instead of with window functions over
+        # every grouped app; rows already arrive ordered by unique_users
+        usage_ranks = {id(row): rank for rank, row in
+                       enumerate(sorted(results, key=lambda r: r["total_seconds"], reverse=True), start=1)}
+        engagement_ranks = {id(row): rank for rank, row in
+                            enumerate(sorted(results, key=lambda r: r["avg_session_seconds"], reverse=True), start=1)}
+        
+        applications = [
+            _build_application(row, user_rank, usage_ranks[id(row)], engagement_ranks[id(row)],
+                               total_unique_users, grand_total_seconds, bool(include_session_extremes))
+            for user_rank, row in enumerate(results, start=1)
+        ]
         
-        # Generate insights
+        # Generate insights; tally every per-app counter in a single pass
         top_app = applications[0] if applications else None
-        avg_users_per_app = round(sum(app['user_metrics']['unique_users'] for app in applications) / len(applications), 1) if applications else 0
+        users_sum = 0
+        top_3_user_percentage = 0
+        high_engagement_count = 0
+        broad_adoption_count = 0
+        frequent_use_count = 0
+        for index, app in enumerate(applications):
+            user_metrics = app['user_metrics']
+            users_sum += user_metrics['unique_users']
+            if index < 3:
+                top_3_user_percentage += user_metrics['user_penetration_percentage']
+            high_engagement_count += user_metrics['avg_usage_per_user_hours'] > 5
+            broad_adoption_count += user_metrics['user_penetration_percentage'] > 10
+            frequent_use_count += user_metrics['avg_sessions_per_user'] > 5
+        avg_users_per_app = round(users_sum / len(applications), 1) if applications else 0
         
         insights = {
             "summary": f"Analysis of top {len(applications)} applications by unique user count",
@@ -291,7 +408,6 @@ async def top_apps_by_users(
             
             # User concentration analysis
             if len(applications) >= 3:
-                top_3_user_percentage = sum(app['user_metrics']['user_penetration_percentage'] for app in applications[:3])
                 insights["key_findings"].append(f"Top 3 applications capture {round(top_3_user_percentage, 1)}% of total users")
                 
                 if top_3_user_percentage > 70:
@@ -301,20 +417,17 @@ async def top_apps_by_users(
         
         # User engagement recommendations
         if applications:
-            high_engagement_apps = [app for app in applications if app['user_metrics']['avg_usage_per_user_hours'] > 5]
-            if high_engagement_apps:
-                insights["recommendations"].append(f"Focus on {len(high_engagement_apps)} high-engagement applications (>5 hours per user)")
+            if high_engagement_count:
+                insights["recommendations"].append(f"Focus on {high_engagement_count} high-engagement applications (>5 hours per user)")
             
-            broad_adoption_apps = [app for app in applications if app['user_metrics']['user_penetration_percentage'] > 10]
-            if broad_adoption_apps:
-                insights["recommendations"].append(f"Leverage {len(broad_adoption_apps)} applications with broad market penetration (>10% users)")
+            if broad_adoption_count:
+                insights["recommendations"].append(f"Leverage {broad_adoption_count} applications with broad market penetration (>10% users)")
             
             # Session frequency analysis
-            frequent_use_apps = [app for app in applications if app['user_metrics']['avg_sessions_per_user'] > 5]
-            if frequent_use_apps:
-                insights["recommendations"].append(f"Promote {len(frequent_use_apps)} applications with high user retention (>5 sessions per user)")
+            if frequent_use_count:
+                insights["recommendations"].append(f"Promote {frequent_use_count} applications with high user retention (>5 sessions per user)")
         
-        return {
+        response = {
             "status": "success",
             "data": {
                 "tool": "top_apps_by_users",
@@ -324,7 +437,8 @@ async def top_apps_by_users(
                     "start_date": start_date,
                     "end_date": end_date,
                     "platform": platform,
-                    "min_users": min_users
+                    "min_users": min_users,
+                    "include_session_extremes": include_session_extremes
                 },
                 "query_time_ms": round(query_time, 2),
                 "total_records": len(applications),
@@ -332,6 +446,8 @@ async def top_apps_by_users(
             },
             "insights": insights
         }
+        _result_cache.set(cache_key, response)
+        return response
         
     except Exception as e:
         logger.error(f"Error in top_apps_by_users: {e}")
@@ -9,9 +9,10 @@ Description:
 Parameters:
     - start_date (str, optional): Start date for analysis (YYYY-MM-DD format)
     - end_date (str, optional): End date for analysis (YYYY-MM-DD format)
-    - period_type (str, optional): Aggregation period ('daily', 'weekly', 'monthly', default: 'daily')
+    - period_type (str, optional): Aggregation period ('daily', 'weekly', 'monthly', 'yearly', default: 'daily')
     - platform (str, optional): Platform to filter by
     - application_name (str, optional): Specific application to analyze
+    - limit (int, optional): Maximum number of periods to return (1-1000, default: all)
 
 Returns:
     - Total usage time aggregated by time periods with detailed analytics and trends
@@ -21,18 +22,170 @@ Created: 2025-01-08
 Last Modified: 2025-01-09
 """
 
-import json
 import logging
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+import time
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
+from itertools import chain
 
 # Import the mcp instance from server_instance module
 from server_instance import mcp
-from shared.database_utils import get_database_connection
+from shared.database_utils import get_database_connection, get_database_mtime_ns
 from shared.date_utils import validate_date_range, format_date_for_db
+from shared.cache_utils import ResultCache
+from scheduler.precompute import ROLLUP_TABLE, rollup_is_current
 
 logger = logging.getLogger(__name__)
 
+# Responses for repeated parameter combinations (e.g. dashboard refreshes)
+_result_cache = ResultCache("total_usage_period", maxsize=256)
+
+# Per-period distinct counts, or placeholders when include_distincts is off
+_DISTINCT_COLUMNS = "COUNT(DISTINCT user) as unique_users, COUNT(DISTINCT application_name) as unique_apps"
+_NO_DISTINCT_COLUMNS = "0 as unique_users, 0 as unique_apps"
+
+
+def _rank_descending(values: List[float]) -> List[int]:
+    """
+    Rank values from highest to lowest, like ROW_NUMBER() OVER (ORDER BY value DESC).
+    
+    Ties keep their original (chronological) order.
+    
+    Args:
+        values: Values to rank
+    
+    Returns:
+        List of 1-based ranks aligned with the input positions
+    """
+    ranks = [0] * len(values)
+    for rank, index in enumerate(sorted(range(len(values)), key=values.__getitem__, reverse=True), start=1):
+        ranks[index] = rank
+    return ranks
+
+
+@lru_cache(maxsize=128)
+def _build_query(
+    period_type: str,
+    has_start_date: bool,
+    has_end_date: bool,
+    has_platform: bool,
+    has_application: bool,
+    include_distincts: bool = True
+) -> str:
+    """
+    Assemble the period aggregation SQL for a given period type and filter shape.
+    
+    There are only 4 period types x 16 filter combinations (x2 for distincts),
+    so each query text is built once and the identical string lets sqlite3's statement cache reuse the
+    prepared statement. Parameters must be bound in the order start_date,
+    end_date, platform, application_name.
+    
+    Args:
+        period_type: Aggregation period ('daily', 'weekly', 'monthly', 'yearly')
+        has_start_date: Whether a start_date filter is applied
+        has_end_date: Whether an end_date filter is applied
+        has_platform: Whether a platform filter is applied
+        has_application: Whether an application_name filter is applied
+        include_distincts: Whether to count distinct users and applications
+    
+    Returns:
+        The period aggregation query
+    """
+    # Build period grouping based on type
+    if period_type == "daily":
+        period_group = "log_date"
+        period_format = "log_date"
+    elif period_type == "weekly":
+        period_group = "strftime('%Y-W%W', log_date)"
+        period_format = "strftime('%Y-W%W', log_date) as period"
+    elif period_type == "monthly":
+        period_group = "strftime('%Y-%m', log_date)"
+        period_format = "strftime('%Y-%m', log_date) as period"
+    else:  # yearly
+        period_group = "strftime('%Y', log_date)"
+        period_format = "strftime('%Y', log_date) as period"
+    
+    where_clause = "WHERE 1=1"
+    if has_start_date:
+        where_clause += " AND log_date >= ?"
+    if has_end_date:
+        where_clause += " AND log_date <= ?"
+    if has_platform:
+        where_clause += " AND platform = ?"
+    if has_application:
+        where_clause += " AND application_name = ?"
+    
+    # Each COUNT(DISTINCT) keeps a temp B-tree per group; skip both when not needed
+    distinct_columns = _DISTINCT_COLUMNS if include_distincts else _NO_DISTINCT_COLUMNS
+    
+    return f"""
+    WITH period_usage AS (
+        SELECT 
+            {period_format},
+            log_date,
+            SUM(duration_seconds) as total_seconds,
+            {distinct_columns},
+            COUNT(*) as total_sessions,
+            AVG(duration_seconds) as avg_session_seconds,
+            MIN(duration_seconds) as min_session_seconds,
+            MAX(duration_seconds) as max_session_seconds
+        FROM app_usage
+        {where_clause}
+        GROUP BY {period_group}
+    )
+    SELECT 
+        {"period" if period_type != "daily" else "log_date as period"},
+        log_date,
+        total_seconds,
+        unique_users,
+        unique_apps,
+        total_sessions,
+        avg_session_seconds,
+        min_session_seconds,
+        max_session_seconds
+    FROM period_usage
+    ORDER BY {"log_date" if period_type == "daily" else "period"}
+    """
+
+
+@lru_cache(maxsize=8)
+def _build_rollup_query(has_start_date: bool, has_end_date: bool, include_distincts: bool = True) -> str:
+    """
+    Assemble the query reading precomputed periods from the rollup table.
+    
+    Returns the same columns as _build_query. Parameters must be bound in the
+    order period_type, platform, application_name ('' for all), start_date,
+    end_date.
+    
+    Args:
+        has_start_date: Whether a start_date filter is applied
+        has_end_date: Whether an end_date filter is applied
+        include_distincts: Whether to return the distinct user and application counts
+    
+    Returns:
+        The rollup query
+    """
+    where_clause = "WHERE period_type = ? AND platform = ? AND application_name = ?"
+    if has_start_date:
+        where_clause += " AND period >= ?"
+    if has_end_date:
+        where_clause += " AND period <= ?"
+    
+    return f"""
+    SELECT 
+        period,
+        period as log_date,
+        total_seconds,
+        {"unique_users, unique_apps" if include_distincts else _NO_DISTINCT_COLUMNS},
+        total_sessions,
+        avg_session_seconds,
+        min_session_seconds,
+        max_session_seconds
+    FROM {ROLLUP_TABLE}
+    {where_clause}
+    ORDER BY period
+    """
+
 
 @mcp.tool()
 async def total_usage_period(
@@ -40,7 +193,9 @@ async def total_usage_period(
     end_date: Optional[str] = None,
     period_type: Optional[str] = "daily",
     platform: Optional[str] = None,
-    application_name: Optional[str] = None
+    application_name: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_distincts: bool = True
 ) -> Dict[str, Any]:
     """
     Calculate total usage time for time periods with comprehensive analytics.
@@ -55,22 +210,31 @@ async def total_usage_period(
     Args:
         start_date: Start date for analysis (YYYY-MM-DD format)
         end_date: End date for analysis (YYYY-MM-DD format)
-        period_type: Aggregation period ('daily', 'weekly', 'monthly', default: 'daily')
+        period_type: Aggregation period ('daily', 'weekly', 'monthly', 'yearly', default: 'daily')
         platform: Platform to filter by (e.g., 'Windows', 'macOS', 'Linux')
         application_name: Specific application to analyze
+        limit: Maximum number of periods to return, in chronological order (1-1000, default: all)
+        include_distincts: Count unique users and applications per period (default: True).
+            Disabling it speeds up the aggregation; user and app counts are then reported as 0
     
     Returns:
         Dict containing usage time aggregated by periods with analytics and insights
     """
     try:
         # Parameter validation
-        valid_period_types = ['daily', 'weekly', 'monthly']
+        valid_period_types = ['daily', 'weekly', 'monthly', 'yearly']
         if period_type and period_type not in valid_period_types:
             return {
                 "status": "error",
                 "message": f"period_type must be one of: {', '.join(valid_period_types)}"
             }
         
+        if limit is not None and (not isinstance(limit, int) or limit < 1 or limit > 1000):
+            return {
+                "status": "error",
+                "message": "limit must be an integer between 1 and 1000"
+            }
+        
         # Validate date range
         if start_date or end_date:
             date_validation = validate_date_range(start_date, end_date)
@@ -83,183 +247,196 @@ async def total_usage_period(
         # Set defaults
         period_type = period_type or "daily"
         
-        # Build period grouping based on type
-        if period_type == "daily":
-            period_group = "log_date"
-            period_format = "log_date"
-        elif period_type == "weekly":
-            period_group = "strftime('%Y-W%W', log_date)"
-            period_format = "strftime('%Y-W%W', log_date) as period"
-        else:  # monthly
-            period_group = "strftime('%Y-%m', log_date)"
-            period_format = "strftime('%Y-%m', log_date) as period"
-        
-        # Build query with CTEs for comprehensive analysis
-        query = f"""
-        WITH period_usage AS (
-            SELECT 
-                {period_format},
-                log_date,
-                SUM(duration_seconds) as total_seconds,
-                COUNT(DISTINCT user) as unique_users,
-                COUNT(DISTINCT application_name) as unique_apps,
-                COUNT(*) as total_sessions,
-                AVG(duration_seconds) as avg_session_seconds,
-                MIN(duration_seconds) as min_session_seconds,
-                MAX(duration_seconds) as max_session_seconds
-            FROM app_usage
-            WHERE 1=1
-        """
+        # The database modification time invalidates cached responses on writes
+        cache_key = (start_date, end_date, period_type, platform, application_name, limit,
+                     include_distincts, get_database_mtime_ns())
+        cached_response = _result_cache.get(cache_key)
+        if cached_response is not None:
+            return cached_response
         
+        # Filter values are bound in the order _build_query expects
         params = []
-        
-        # Add date filters
         if start_date:
-            query += " AND log_date >= ?"
             params.append(format_date_for_db(start_date))
-        
         if end_date:
-            query += " AND log_date <= ?"
             params.append(format_date_for_db(end_date))
-        
-        # Add platform filter
         if platform:
-            query += " AND platform = ?"
             params.append(platform)
-        
-        # Add application filter
         if application_name:
-            query += " AND application_name = ?"
             params.append(application_name)
         
-        query += f"""
-            GROUP BY {period_group}
-        ),
-        period_stats AS (
-            SELECT 
-                pu.*,
-                SUM(total_seconds) OVER () as grand_total_seconds,
-                SUM(unique_users) OVER () as grand_total_users,
-                SUM(total_sessions) OVER () as grand_total_sessions,
-                COUNT(*) OVER () as total_periods,
-                AVG(total_seconds) OVER () as avg_period_seconds,
-                LAG(total_seconds) OVER (ORDER BY {"log_date" if period_type == "daily" else "period"}) as prev_period_seconds,
-                ROW_NUMBER() OVER (ORDER BY total_seconds DESC) as usage_rank,
-                ROW_NUMBER() OVER (ORDER BY unique_users DESC) as user_rank,
-                ROW_NUMBER() OVER (ORDER BY total_sessions DESC) as session_rank
-            FROM period_usage pu
+        query = _build_query(
+            period_type,
+            bool(start_date),
+            bool(end_date),
+            bool(platform),
+            bool(application_name),
+            include_distincts
         )
-        SELECT 
-            {"period" if period_type != "daily" else "log_date as period"},
-            log_date,
-            total_seconds,
-            unique_users,
-            unique_apps,
-            total_sessions,
-            avg_session_seconds,
-            min_session_seconds,
-            max_session_seconds,
-            grand_total_seconds,
-            grand_total_users,
-            grand_total_sessions,
-            total_periods,
-            avg_period_seconds,
-            prev_period_seconds,
-            usage_rank,
-            user_rank,
-            session_rank
-        FROM period_stats
-        ORDER BY {"log_date" if period_type == "daily" else "period"}
-        """
         
         # Execute query
         with get_database_connection() as conn:
             cursor = conn.cursor()
-            start_time = datetime.now()
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            query_time = (datetime.now() - start_time).total_seconds() * 1000
-        
-        if not results:
-            return {
-                "status": "success",
-                "data": {
-                    "tool": "total_usage_period",
-                    "description": "Calculate total usage time for time periods",
-                    "parameters": {
-                        "start_date": start_date,
-                        "end_date": end_date,
-                        "period_type": period_type,
-                        "platform": platform,
-                        "application_name": application_name
+            start_ns = time.perf_counter_ns()
+            # Whole periods can be served from the nightly rollups while they are
+            # current; a date range only aligns with period boundaries for daily
+            if (period_type == "daily" or not (start_date or end_date)) and rollup_is_current(conn):
+                rollup_params = [period_type, platform or "", application_name or ""]
+                rollup_params.extend(params[:bool(start_date) + bool(end_date)])
+                cursor.execute(_build_rollup_query(bool(start_date), bool(end_date), include_distincts), rollup_params)
+            else:
+                cursor.execute(query, params)
+            first_row = cursor.fetchone()
+            query_time = (time.perf_counter_ns() - start_ns) / 1e6
+            
+            if first_row is None:
+                return {
+                    "status": "success",
+                    "data": {
+                        "tool": "total_usage_period",
+                        "description": "Calculate total usage time for time periods",
+                        "parameters": {
+                            "start_date": start_date,
+                            "end_date": end_date,
+                            "period_type": period_type,
+                            "platform": platform,
+                            "application_name": application_name,
+                            "limit": limit,
+                            "include_distincts": include_distincts
+                        },
+                        "query_time_ms": round(query_time, 2),
+                        "total_records": 0,
+                        "periods": []
                     },
-                    "query_time_ms": round(query_time, 2),
-                    "total_records": 0,
-                    "periods": []
-                },
-                "insights": {
-                    "summary": "No usage data found for the specified criteria",
-                    "recommendations": [
-                        "Try expanding the date range for analysis",
-                        "Check if the specified platform has recorded usage data",
-                        "Verify the application name if filtering by specific app"
-                    ]
+                    "insights": {
+                        "summary": "No usage data found for the specified criteria",
+                        "recommendations": [
+                            "Try expanding the date range for analysis",
+                            "Check if the specified platform has recorded usage data",
+                            "Verify the application name if filtering by specific app"
+                        ]
+                    }
                 }
-            }
-        
-        # Process results
-        periods = []
-        grand_total_seconds = results[0][9] if results else 0
-        grand_total_users = results[0][10] if results else 0
-        grand_total_sessions = results[0][11] if results else 0
-        total_periods = results[0][12] if results else 0
-        avg_period_seconds = results[0][13] if results else 0
-        
-        for row in results:
-            # Calculate growth rate
-            growth_rate = None
-            if row[14] is not None and row[14] > 0:  # prev_period_seconds
-                growth_rate = round(((row[2] - row[14]) / row[14]) * 100, 2)
             
-            period_data = {
-                "period": row[0],
-                "date": row[1] if period_type == "daily" else None,
-                "usage_metrics": {
-                    "total_hours": round(row[2] / 3600, 2),  # total_seconds to hours
-                    "total_minutes": round(row[2] / 60, 2),  # total_seconds to minutes
-                    "percentage_of_total": round((row[2] / grand_total_seconds) * 100, 2) if grand_total_seconds > 0 else 0,
-                    "usage_rank": int(row[15]),  # usage_rank
-                    "vs_average": round(((row[2] - avg_period_seconds) / avg_period_seconds) * 100, 2) if avg_period_seconds > 0 else 0
-                },
-                "user_metrics": {
-                    "unique_users": int(row[3]),
-                    "user_rank": int(row[16]),  # user_rank
-                    "percentage_of_total_users": round((row[3] / grand_total_users) * 100, 2) if grand_total_users > 0 else 0
-                },
-                "activity_metrics": {
-                    "unique_apps": int(row[4]),
-                    "total_sessions": int(row[5]),
-                    "session_rank": int(row[17]),  # session_rank
-                    "avg_session_minutes": round(row[6] / 60, 2),  # avg_session_seconds to minutes
-                    "min_session_minutes": round(row[7] / 60, 2),  # min_session_seconds to minutes
-                    "max_session_minutes": round(row[8] / 60, 2),  # max_session_seconds to minutes
-                    "sessions_per_user": round(row[5] / row[3], 2) if row[3] > 0 else 0
-                },
-                "trend_analysis": {
-                    "growth_rate_percentage": growth_rate,
-                    "trend_direction": "up" if growth_rate and growth_rate > 0 else "down" if growth_rate and growth_rate < 0 else "stable"
+            # Process results. Grand totals are accumulated here rather than with
+            # window aggregates; they cover every period, while only the first
+            # `limit` periods are reported
+            periods = []
+            # Per-period values of every period (not only the reported ones),
+            # used for the grand-total percentages and the Python-side ranks
+            period_seconds = []
+            period_users = []
+            period_sessions = []
+            grand_total_seconds = 0
+            grand_total_users = 0
+            grand_total_sessions = 0
+            total_periods = 0
+            prev_period_seconds = None  # rows arrive in period order
+            # Peak/low periods and the insight counters are tracked in the same
+            # pass instead of separate scans over `periods`. Like the grand
+            # totals they cover every period, not only the reported ones;
+            # each holds a (period, value) pair
+            peak_period = None
+            low_period = None
+            peak_user_period = None
+            growth_period_count = 0
+            decline_period_count = 0
+            high_activity_count = 0
+            diverse_app_count = 0
+            
+            is_daily = period_type == "daily"
+            
+            # Stream the remaining rows from the cursor instead of materializing them.
+            # Each row is unpacked once; sqlite3.Row indexing is a method call
+            for row in chain((first_row,), cursor):
+                (period, log_date, total_seconds, unique_users, unique_apps, total_sessions,
+                 avg_session_seconds, min_session_seconds, max_session_seconds) = row
+                total_periods += 1
+                grand_total_seconds += total_seconds
+                grand_total_users += unique_users
+                grand_total_sessions += total_sessions
+                period_seconds.append(total_seconds)
+                period_users.append(unique_users)
+                period_sessions.append(total_sessions)
+                
+                # Calculate growth rate against the previous period
+                growth_rate = None
+                if prev_period_seconds is not None and prev_period_seconds > 0:
+                    growth_rate = round(((total_seconds - prev_period_seconds) / prev_period_seconds) * 100, 2)
+                prev_period_seconds = total_seconds
+                
+                total_hours = round(total_seconds / 3600, 2)
+                sessions_per_user = round(total_sessions / unique_users, 2) if unique_users > 0 else 0
+                if peak_period is None or total_hours > peak_period[1]:
+                    peak_period = (period, total_hours)
+                if low_period is None or total_hours < low_period[1]:
+                    low_period = (period, total_hours)
+                if peak_user_period is None or unique_users > peak_user_period[1]:
+                    peak_user_period = (period, unique_users)
+                if growth_rate and growth_rate > 0:
+                    growth_period_count += 1
+                elif growth_rate and growth_rate < 0:
+                    decline_period_count += 1
+                if sessions_per_user > 3:
+                    high_activity_count += 1
+                if unique_apps > 5:
+                    diverse_app_count += 1
+                
+                if limit and total_periods > limit:
+                    continue
+                
+                period_data = {
+                    "period": period,
+                    "date": log_date if is_daily else None,
+                    "usage_metrics": {
+                        "total_hours": total_hours,
+                        "total_minutes": round(total_seconds / 60, 2),
+                        "percentage_of_total": 0,  # filled in once every period is known
+                        "usage_rank": 0,
+                        "vs_average": 0
+                    },
+                    "user_metrics": {
+                        "unique_users": int(unique_users),
+                        "user_rank": 0,
+                        "percentage_of_total_users": 0
+                    },
+                    "activity_metrics": {
+                        "unique_apps": int(unique_apps),
+                        "total_sessions": int(total_sessions),
+                        "session_rank": 0,
+                        "avg_session_minutes": round(avg_session_seconds / 60, 2),
+                        "min_session_minutes": round(min_session_seconds / 60, 2),
+                        "max_session_minutes": round(max_session_seconds / 60, 2),
+                        "sessions_per_user": sessions_per_user
+                    },
+                    "trend_analysis": {
+                        "growth_rate_percentage": growth_rate,
+                        "trend_direction": "up" if growth_rate and growth_rate > 0 else "down" if growth_rate and growth_rate < 0 else "stable"
+                    }
                 }
-            }
-            periods.append(period_data)
+                periods.append(period_data)
         
-        # Generate insights
-        peak_period = max(periods, key=lambda x: x['usage_metrics']['total_hours']) if periods else None
-        low_period = min(periods, key=lambda x: x['usage_metrics']['total_hours']) if periods else None
+        # Rank periods in Python; the period count is small after aggregation,
+        # so this is cheaper than three ROW_NUMBER() sorts inside SQLite
+        usage_ranks = _rank_descending(period_seconds)
+        user_ranks = _rank_descending(period_users)
+        session_ranks = _rank_descending(period_sessions)
         
-        # Calculate trend analysis
-        positive_growth_periods = [p for p in periods if p['trend_analysis']['growth_rate_percentage'] and p['trend_analysis']['growth_rate_percentage'] > 0]
-        negative_growth_periods = [p for p in periods if p['trend_analysis']['growth_rate_percentage'] and p['trend_analysis']['growth_rate_percentage'] < 0]
+        avg_period_seconds = grand_total_seconds / total_periods
+        for index, period_data in enumerate(periods):
+            total_seconds = period_seconds[index]
+            usage_metrics = period_data["usage_metrics"]
+            usage_metrics["usage_rank"] = usage_ranks[index]
+            period_data["user_metrics"]["user_rank"] = user_ranks[index]
+            period_data["activity_metrics"]["session_rank"] = session_ranks[index]
+            if grand_total_seconds > 0:
+                usage_metrics["percentage_of_total"] = round((total_seconds / grand_total_seconds) * 100, 2)
+            if avg_period_seconds > 0:
+                usage_metrics["vs_average"] = round(((total_seconds - avg_period_seconds) / avg_period_seconds) * 100, 2)
+            if grand_total_users > 0:
+                period_data["user_metrics"]["percentage_of_total_users"] = round((period_users[index] / grand_total_users) * 100, 2)
         
+        # Generate insights
         insights = {
             "summary": f"Analysis of {len(periods)} {period_type} periods showing usage patterns over time",
             "key_findings": [],
@@ -272,23 +449,25 @@ async def total_usage_period(
                 "average_usage_per_period_hours": round(avg_period_seconds / 3600, 2)
             },
             "trend_analysis": {
-                "periods_with_growth": len(positive_growth_periods),
-                "periods_with_decline": len(negative_growth_periods),
-                "growth_trend": "positive" if len(positive_growth_periods) > len(negative_growth_periods) else "negative" if len(negative_growth_periods) > len(positive_growth_periods) else "mixed"
+                "periods_with_growth": growth_period_count,
+                "periods_with_decline": decline_period_count,
+                "growth_trend": "positive" if growth_period_count > decline_period_count else "negative" if decline_period_count > growth_period_count else "mixed"
             },
             "recommendations": []
         }
         
         if peak_period and low_period:
+            peak_name, peak_hours = peak_period
+            low_name, low_hours = low_period
             insights["key_findings"].extend([
-                f"Peak usage period: {peak_period['period']} with {peak_period['usage_metrics']['total_hours']} hours",
-                f"Lowest usage period: {low_period['period']} with {low_period['usage_metrics']['total_hours']} hours",
-                f"Usage variation: {round(((peak_period['usage_metrics']['total_hours'] - low_period['usage_metrics']['total_hours']) / low_period['usage_metrics']['total_hours']) * 100, 1)}% difference between peak and low"
+                f"Peak usage period: {peak_name} with {peak_hours} hours",
+                f"Lowest usage period: {low_name} with {low_hours} hours",
+                f"Usage variation: {round(((peak_hours - low_hours) / low_hours) * 100, 1)}% difference between peak and low"
             ])
             
             # User engagement analysis
-            peak_user_period = max(periods, key=lambda x: x['user_metrics']['unique_users'])
-            insights["key_findings"].append(f"Highest user engagement: {peak_user_period['period']} with {peak_user_period['user_metrics']['unique_users']} unique users")
+            if include_distincts:
+                insights["key_findings"].append(f"Highest user engagement: {peak_user_period[0]} with {int(peak_user_period[1])} unique users")
         
         # Growth trend recommendations
         if insights["trend_analysis"]["growth_trend"] == "positive":
@@ -299,16 +478,13 @@ async def total_usage_period(
             insights["recommendations"].append("Mixed growth pattern - analyze successful periods to replicate positive factors")
         
         # Activity pattern recommendations
-        if periods:
-            high_activity_periods = [p for p in periods if p['activity_metrics']['sessions_per_user'] > 3]
-            if high_activity_periods:
-                insights["recommendations"].append(f"Focus on replicating conditions from {len(high_activity_periods)} high-activity periods (>3 sessions per user)")
-            
-            diverse_app_periods = [p for p in periods if p['activity_metrics']['unique_apps'] > 5]
-            if diverse_app_periods:
-                insights["recommendations"].append(f"Promote app diversity - {len(diverse_app_periods)} periods showed healthy app variety (>5 unique apps)")
+        if high_activity_count:
+            insights["recommendations"].append(f"Focus on replicating conditions from {high_activity_count} high-activity periods (>3 sessions per user)")
         
-        return {
+        if diverse_app_count:
+            insights["recommendations"].append(f"Promote app diversity - {diverse_app_count} periods showed healthy app variety (>5 unique apps)")
+        
+        response = {
             "status": "success",
             "data": {
                 "tool": "total_usage_period",
@@ -318,7 +494,9 @@ async def total_usage_period(
                     "end_date": end_date,
                     "period_type": period_type,
                     "platform": platform,
-                    "application_name": application_name
+                    "application_name": application_name,
+                    "limit": limit,
+                    "include_distincts": include_distincts
                 },
                 "query_time_ms": round(query_time, 2),
                 "total_records": len(periods),
@@ -326,6 +504,8 @@ async def total_usage_period(
             },
             "insights": insights
         }
+        _result_cache.set(cache_key, response)
+        return response
         
     except Exception as e:
         logger.error(f"Error in total_usage_period: {e}")
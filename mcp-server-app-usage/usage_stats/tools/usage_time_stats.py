@@ -21,18 +21,203 @@ Created: 2025-01-08
 Last Modified: 2025-01-09
 """
 
-import json
 import logging
+import time
+from functools import lru_cache
+from itertools import chain
 from typing import Optional, Dict, Any
-from datetime import datetime
 
 # Import the mcp instance from server_instance module
 from server_instance import mcp
-from shared.database_utils import get_database_connection
+from shared.database_utils import get_database_connection, get_database_mtime_ns, sample_stddev_sql, MATERIALIZED
+from shared.cache_utils import ResultCache
+from shared.analytics_utils import quartile_from_rank
 from shared.date_utils import validate_date_range, format_date_for_db
+from scheduler.precompute import APP_DAILY_ROLLUP_TABLE, rollup_is_current
 
 logger = logging.getLogger(__name__)
 
+# Grand totals over all matching applications, keyed by the filters. Every
+# call with the same filters shares them regardless of limit, so repeat
+# queries skip the second pass over the per-application aggregates
+_total_stats_cache = ResultCache("usage_time_stats_totals", maxsize=128)
+
+
+@lru_cache(maxsize=64)
+def _build_query(
+    has_start_date: bool,
+    has_end_date: bool,
+    has_platform: bool,
+    use_daily_rollup: bool,
+    has_cached_totals: bool
+) -> str:
+    """
+    Assemble the usage statistics SQL for a given filter shape.
+    
+    Each of the 32 variants is built once, and the identical string lets
+    sqlite3's statement cache reuse the prepared statement. Parameters must
+    be bound in the order: the filters (start_date, end_date, platform;
+    twice when reading the daily rollup), min_usage_seconds, the six cached
+    totals when has_cached_totals is set, and limit.
+    
+    Args:
+        has_start_date: Whether a start_date filter is applied
+        has_end_date: Whether an end_date filter is applied
+        has_platform: Whether a platform filter is applied
+        use_daily_rollup: Whether to aggregate the daily rollup instead of app_usage
+        has_cached_totals: Whether the grand totals are bound as parameters
+    
+    Returns:
+        The usage statistics query
+    """
+    # Filters shared by every CTE that reads usage rows
+    filter_clause = ""
+    if has_start_date:
+        filter_clause += " AND log_date >= ?"
+    if has_end_date:
+        filter_clause += " AND log_date <= ?"
+    if has_platform:
+        filter_clause += " AND platform = ?"
+    
+    if use_daily_rollup:
+        # Aggregate the nightly per-day rollup (one row per app, platform
+        # and day); distinct users do not add up across days, so they are
+        # still counted from app_usage
+        session_stddev = sample_stddev_sql(
+            "SUM(total_seconds)", "SUM(sum_sq_seconds)", "SUM(total_sessions)"
+        )
+        query = f"""
+    WITH app_users AS (
+        SELECT 
+            application_name,
+            platform,
+            COUNT(DISTINCT user) as unique_users
+        FROM app_usage
+        WHERE 1=1{filter_clause}
+        GROUP BY application_name, platform
+    ),
+    daily_stats AS (
+        SELECT 
+            application_name,
+            platform,
+            SUM(total_seconds) as total_seconds,
+            SUM(total_sessions) as total_sessions,
+            SUM(total_seconds) * 1.0 / SUM(total_sessions) as avg_session_seconds,
+            MIN(min_session_seconds) as min_session_seconds,
+            MAX(max_session_seconds) as max_session_seconds,
+            {session_stddev} as stddev_session_seconds,
+            MIN(log_date) as first_usage_date,
+            MAX(log_date) as last_usage_date,
+            COUNT(*) as active_days
+        FROM {APP_DAILY_ROLLUP_TABLE}
+        WHERE 1=1{filter_clause}
+        GROUP BY application_name, platform
+        HAVING SUM(total_seconds) >= ?
+    ),
+    app_usage_stats AS {MATERIALIZED} (
+        SELECT 
+            d.application_name,
+            d.platform,
+            d.total_seconds,
+            d.total_sessions,
+            u.unique_users,
+            d.avg_session_seconds,
+            d.min_session_seconds,
+            d.max_session_seconds,
+            d.stddev_session_seconds,
+            d.first_usage_date,
+            d.last_usage_date,
+            d.active_days
+        FROM daily_stats d
+        JOIN app_users u USING (application_name, platform)
+    ),"""
+    else:
+        session_stddev = sample_stddev_sql(
+            "SUM(duration_seconds)", "SUM(duration_seconds * duration_seconds)", "COUNT(*)"
+        )
+        query = f"""
+    WITH app_usage_stats AS {MATERIALIZED} (
+        SELECT 
+            application_name,
+            platform,
+            SUM(duration_seconds) as total_seconds,
+            COUNT(*) as total_sessions,
+            COUNT(DISTINCT user) as unique_users,
+            AVG(duration_seconds) as avg_session_seconds,
+            MIN(duration_seconds) as min_session_seconds,
+            MAX(duration_seconds) as max_session_seconds,
+            {session_stddev} as stddev_session_seconds,
+            MIN(log_date) as first_usage_date,
+            MAX(log_date) as last_usage_date,
+            COUNT(DISTINCT log_date) as active_days
+        FROM app_usage
+        WHERE 1=1{filter_clause}
+        GROUP BY application_name, platform
+        HAVING SUM(duration_seconds) >= ?
+    ),"""
+    
+    if has_cached_totals:
+        query += """
+    total_stats AS (
+        SELECT 
+            ? as grand_total_seconds,
+            ? as grand_total_users,
+            ? as grand_total_sessions,
+            ? as total_apps,
+            ? as avg_app_usage_seconds,
+            ? as stddev_app_usage_seconds
+    )"""
+    else:
+        # Totals can exceed the int64 range once squared, so square them as REAL
+        app_usage_stddev = sample_stddev_sql(
+            "SUM(total_seconds)", "SUM(total_seconds * 1.0 * total_seconds)", "COUNT(*)"
+        )
+        query += f"""
+    total_stats AS (
+        SELECT 
+            SUM(total_seconds) as grand_total_seconds,
+            SUM(unique_users) as grand_total_users,
+            SUM(total_sessions) as grand_total_sessions,
+            COUNT(*) as total_apps,
+            AVG(total_seconds) as avg_app_usage_seconds,
+            {app_usage_stddev} as stddev_app_usage_seconds
+        FROM app_usage_stats
+    )"""
+    
+    # Rank, quartile and usage category follow from the sort order and the
+    # grand totals, so they are assigned while streaming the rows instead
+    # of in a window pass over every application. The usage span is
+    # computed here so no dates are parsed in Python
+    return query + """
+    SELECT 
+        aus.application_name,
+        aus.platform,
+        aus.total_seconds,
+        aus.total_sessions,
+        aus.unique_users,
+        aus.avg_session_seconds,
+        aus.min_session_seconds,
+        aus.max_session_seconds,
+        aus.stddev_session_seconds,
+        aus.first_usage_date,
+        aus.last_usage_date,
+        aus.active_days,
+        ROUND((aus.total_seconds * 100.0 / ts.grand_total_seconds), 2) as usage_percentage,
+        ROUND((aus.unique_users * 100.0 / ts.grand_total_users), 2) as user_percentage,
+        ROUND((aus.total_sessions * 100.0 / ts.grand_total_sessions), 2) as session_percentage,
+        CAST(julianday(aus.last_usage_date) - julianday(aus.first_usage_date) AS INTEGER) + 1 as usage_span_days,
+        ts.grand_total_seconds,
+        ts.grand_total_users,
+        ts.grand_total_sessions,
+        ts.total_apps,
+        ts.avg_app_usage_seconds,
+        ts.stddev_app_usage_seconds
+    FROM app_usage_stats aus
+    CROSS JOIN total_stats ts
+    ORDER BY aus.total_seconds DESC
+    LIMIT ?
+    """
+
 
 @mcp.tool()
 async def usage_time_stats(
@@ -89,211 +274,176 @@ async def usage_time_stats(
         limit = limit or 100
         min_usage_seconds = (min_usage_hours * 3600) if min_usage_hours else 0
         
-        # Build query with CTEs for comprehensive analysis
-        query = """
-        WITH app_usage_stats AS (
-            SELECT 
-                application_name,
-                platform,
-                SUM(duration_seconds) as total_seconds,
-                COUNT(*) as total_sessions,
-                COUNT(DISTINCT user) as unique_users,
-                AVG(duration_seconds) as avg_session_seconds,
-                MIN(duration_seconds) as min_session_seconds,
-                MAX(duration_seconds) as max_session_seconds,
-                STDDEV(duration_seconds) as stddev_session_seconds,
-                MIN(log_date) as first_usage_date,
-                MAX(log_date) as last_usage_date,
-                COUNT(DISTINCT log_date) as active_days
-            FROM app_usage
-            WHERE 1=1
-        """
+        # Echoed back in both the empty and the full response
+        parameters = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "limit": limit,
+            "platform": platform,
+            "min_usage_hours": min_usage_hours
+        }
         
-        params = []
+        # Filters shared by every CTE that reads usage rows
+        filter_params = []
         
         # Add date filters
         if start_date:
-            query += " AND log_date >= ?"
-            params.append(format_date_for_db(start_date))
+            filter_params.append(format_date_for_db(start_date))
         
         if end_date:
-            query += " AND log_date <= ?"
-            params.append(format_date_for_db(end_date))
+            filter_params.append(format_date_for_db(end_date))
         
         # Add platform filter
         if platform:
-            query += " AND platform = ?"
-            params.append(platform)
+            filter_params.append(platform)
         
-        query += """
-            GROUP BY application_name, platform
-            HAVING SUM(duration_seconds) >= ?
-        ),
-        total_stats AS (
-            SELECT 
-                SUM(total_seconds) as grand_total_seconds,
-                SUM(unique_users) as grand_total_users,
-                SUM(total_sessions) as grand_total_sessions,
-                COUNT(*) as total_apps,
-                AVG(total_seconds) as avg_app_usage_seconds,
-                STDDEV(total_seconds) as stddev_app_usage_seconds
-            FROM app_usage_stats
-        ),
-        usage_percentiles AS (
-            SELECT 
-                aus.*,
-                ts.grand_total_seconds,
-                ts.grand_total_users,
-                ts.grand_total_sessions,
-                ts.total_apps,
-                ts.avg_app_usage_seconds,
-                ts.stddev_app_usage_seconds,
-                ROUND((aus.total_seconds * 100.0 / ts.grand_total_seconds), 2) as usage_percentage,
-                ROUND((aus.unique_users * 100.0 / ts.grand_total_users), 2) as user_percentage,
-                ROUND((aus.total_sessions * 100.0 / ts.grand_total_sessions), 2) as session_percentage,
-                ROW_NUMBER() OVER (ORDER BY aus.total_seconds DESC) as usage_rank,
-                NTILE(4) OVER (ORDER BY aus.total_seconds) as usage_quartile,
-                CASE 
-                    WHEN aus.total_seconds > ts.avg_app_usage_seconds + ts.stddev_app_usage_seconds THEN 'High'
-                    WHEN aus.total_seconds < ts.avg_app_usage_seconds - ts.stddev_app_usage_seconds THEN 'Low'
-                    ELSE 'Medium'
-                END as usage_category
-            FROM app_usage_stats aus
-            CROSS JOIN total_stats ts
-        )
-        SELECT 
-            application_name,
+        with get_database_connection() as conn:
+            use_daily_rollup = rollup_is_current(conn, APP_DAILY_ROLLUP_TABLE)
+        
+        # The file modification time invalidates the totals as soon as new
+        # usage rows are written
+        totals_key = (
+            format_date_for_db(start_date) if start_date else None,
+            format_date_for_db(end_date) if end_date else None,
             platform,
-            total_seconds,
-            total_sessions,
-            unique_users,
-            avg_session_seconds,
-            min_session_seconds,
-            max_session_seconds,
-            stddev_session_seconds,
-            first_usage_date,
-            last_usage_date,
-            active_days,
-            usage_percentage,
-            user_percentage,
-            session_percentage,
-            usage_rank,
-            usage_quartile,
-            usage_category,
-            grand_total_seconds,
-            grand_total_users,
-            grand_total_sessions,
-            total_apps,
-            avg_app_usage_seconds,
-            stddev_app_usage_seconds
-        FROM usage_percentiles
-        ORDER BY total_seconds DESC
-        LIMIT ?
-        """
+            min_usage_seconds,
+            get_database_mtime_ns()
+        )
+        cached_totals = _total_stats_cache.get(totals_key)
         
-        params.extend([min_usage_seconds, limit])
+        query = _build_query(
+            bool(start_date), bool(end_date), bool(platform),
+            use_daily_rollup, cached_totals is not None
+        )
+        # The daily rollup path filters app_usage (for distinct users) and the
+        # rollup table separately
+        params = filter_params * (2 if use_daily_rollup else 1) + [min_usage_seconds]
+        if cached_totals is not None:
+            params.extend(cached_totals)
+        params.append(limit)
         
         # Execute query
         with get_database_connection() as conn:
             cursor = conn.cursor()
-            start_time = datetime.now()
+            start_ns = time.perf_counter_ns()
             cursor.execute(query, params)
-            results = cursor.fetchall()
-            query_time = (datetime.now() - start_time).total_seconds() * 1000
-        
-        if not results:
-            return {
-                "status": "success",
-                "data": {
-                    "tool": "usage_time_stats",
-                    "description": "Comprehensive usage time statistics",
-                    "parameters": {
-                        "start_date": start_date,
-                        "end_date": end_date,
-                        "limit": limit,
-                        "platform": platform,
-                        "min_usage_hours": min_usage_hours
+            first_row = cursor.fetchone()
+            query_time = (time.perf_counter_ns() - start_ns) / 1e6
+            
+            if first_row is None:
+                return {
+                    "status": "success",
+                    "data": {
+                        "tool": "usage_time_stats",
+                        "description": "Comprehensive usage time statistics",
+                        "parameters": parameters,
+                        "query_time_ms": round(query_time, 2),
+                        "total_records": 0,
+                        "applications": []
                     },
-                    "query_time_ms": round(query_time, 2),
-                    "total_records": 0,
-                    "applications": []
-                },
-                "insights": {
-                    "summary": "No applications found matching the specified criteria",
-                    "recommendations": [
-                        "Try expanding the date range for analysis",
-                        "Remove or reduce the minimum usage hours filter",
-                        "Check if the specified platform has recorded usage data"
-                    ]
+                    "insights": {
+                        "summary": "No applications found matching the specified criteria",
+                        "recommendations": [
+                            "Try expanding the date range for analysis",
+                            "Remove or reduce the minimum usage hours filter",
+                            "Check if the specified platform has recorded usage data"
+                        ]
+                    }
                 }
-            }
-        
-        # Process results
-        applications = []
-        grand_total_seconds = results[0][18] if results else 0
-        grand_total_users = results[0][19] if results else 0
-        grand_total_sessions = results[0][20] if results else 0
-        total_apps_in_db = results[0][21] if results else 0
-        avg_app_usage_seconds = results[0][22] if results else 0
-        stddev_app_usage_seconds = results[0][23] if results else 0
-        
-        for row in results:
-            # Calculate additional metrics
-            usage_intensity = "High" if row[2] > avg_app_usage_seconds + stddev_app_usage_seconds else "Low" if row[2] < avg_app_usage_seconds - stddev_app_usage_seconds else "Medium"
-            sessions_per_day = round(row[3] / row[11], 2) if row[11] > 0 else 0
-            users_per_day = round(row[4] / row[11], 2) if row[11] > 0 else 0
             
-            app_data = {
-                "rank": int(row[15]),  # usage_rank
-                "application_name": row[0],
-                "platform": row[1],
-                "usage_metrics": {
-                    "total_hours": round(row[2] / 3600, 2),  # total_seconds to hours
-                    "total_minutes": round(row[2] / 60, 2),  # total_seconds to minutes
-                    "usage_percentage": row[12],  # usage_percentage
-                    "usage_quartile": int(row[16]),  # usage_quartile (1=lowest, 4=highest)
-                    "usage_category": row[17],  # usage_category
-                    "usage_intensity": usage_intensity
-                },
-                "session_metrics": {
-                    "total_sessions": int(row[3]),
-                    "session_percentage": row[14],  # session_percentage
-                    "avg_session_minutes": round(row[5] / 60, 2),  # avg_session_seconds to minutes
-                    "min_session_minutes": round(row[6] / 60, 2),  # min_session_seconds to minutes
-                    "max_session_minutes": round(row[7] / 60, 2),  # max_session_seconds to minutes
-                    "session_variability": round(row[8] / 60, 2) if row[8] else 0,  # stddev_session_seconds to minutes
-                    "sessions_per_day": sessions_per_day
-                },
-                "user_metrics": {
-                    "unique_users": int(row[4]),
-                    "user_percentage": row[13],  # user_percentage
-                    "sessions_per_user": round(row[3] / row[4], 2) if row[4] > 0 else 0,
-                    "avg_usage_per_user_hours": round(row[2] / row[4] / 3600, 2) if row[4] > 0 else 0,
-                    "users_per_day": users_per_day
-                },
-                "timeline": {
-                    "first_usage_date": row[9],
-                    "last_usage_date": row[10],
-                    "active_days": int(row[11]),
-                    "usage_span_days": (datetime.strptime(row[10], '%Y-%m-%d') - 
-                                      datetime.strptime(row[9], '%Y-%m-%d')).days + 1,
-                    "usage_frequency": round((row[11] / ((datetime.strptime(row[10], '%Y-%m-%d') - 
-                                                        datetime.strptime(row[9], '%Y-%m-%d')).days + 1)) * 100, 1)
+            # Process results. The grand totals repeat on every row, so they are
+            # read from the first one and the rest are streamed from the cursor
+            applications = []
+            grand_total_seconds = first_row["grand_total_seconds"]
+            grand_total_users = first_row["grand_total_users"]
+            grand_total_sessions = first_row["grand_total_sessions"]
+            total_apps_in_db = first_row["total_apps"]
+            avg_app_usage_seconds = first_row["avg_app_usage_seconds"]
+            stddev_app_usage_seconds = first_row["stddev_app_usage_seconds"]
+            if cached_totals is None:
+                _total_stats_cache.set(totals_key, (
+                    grand_total_seconds, grand_total_users, grand_total_sessions,
+                    total_apps_in_db, avg_app_usage_seconds, stddev_app_usage_seconds
+                ))
+            
+            # Bounds for the High/Low usage categories (a single application
+            # has no deviation and is always Medium)
+            high_usage_threshold = avg_app_usage_seconds + (stddev_app_usage_seconds or 0)
+            low_usage_threshold = avg_app_usage_seconds - (stddev_app_usage_seconds or 0)
+            # Category and recommendation counts are tallied in the same pass
+            category_counts = {"High": 0, "Medium": 0, "Low": 0}
+            top_quartile_count = 0
+            high_variability_count = 0
+            consistent_usage_count = 0
+            power_user_count = 0
+            
+            for usage_rank, row in enumerate(chain((first_row,), cursor), 1):
+                # Unpack once; the names follow the SELECT list, and SQLite
+                # already returns the counts as ints
+                (app_name, app_platform, total_seconds, total_sessions, unique_users,
+                 avg_session_seconds, min_session_seconds, max_session_seconds,
+                 stddev_session_seconds, first_usage_date, last_usage_date, active_days,
+                 usage_percentage, user_percentage, session_percentage, usage_span_days) = row[:16]
+                
+                # Calculate additional metrics
+                usage_intensity = "High" if total_seconds > high_usage_threshold else "Low" if total_seconds < low_usage_threshold else "Medium"
+                usage_quartile = quartile_from_rank(usage_rank, total_apps_in_db)
+                sessions_per_day = round(total_sessions / active_days, 2) if active_days > 0 else 0
+                users_per_day = round(unique_users / active_days, 2) if active_days > 0 else 0
+                session_variability = round(stddev_session_seconds / 60, 2) if stddev_session_seconds else 0
+                avg_usage_per_user_hours = round(total_seconds / unique_users / 3600, 2) if unique_users > 0 else 0
+                usage_frequency = round((active_days / usage_span_days) * 100, 1)
+                
+                app_data = {
+                    "rank": usage_rank,
+                    "application_name": app_name,
+                    "platform": app_platform,
+                    "usage_metrics": {
+                        "total_hours": round(total_seconds / 3600, 2),
+                        "total_minutes": round(total_seconds / 60, 2),
+                        "usage_percentage": usage_percentage,
+                        "usage_quartile": usage_quartile,  # 1=lowest, 4=highest
+                        "usage_category": usage_intensity,
+                        "usage_intensity": usage_intensity
+                    },
+                    "session_metrics": {
+                        "total_sessions": total_sessions,
+                        "session_percentage": session_percentage,
+                        "avg_session_minutes": round(avg_session_seconds / 60, 2),
+                        "min_session_minutes": round(min_session_seconds / 60, 2),
+                        "max_session_minutes": round(max_session_seconds / 60, 2),
+                        "session_variability": session_variability,  # std dev in minutes
+                        "sessions_per_day": sessions_per_day
+                    },
+                    "user_metrics": {
+                        "unique_users": unique_users,
+                        "user_percentage": user_percentage,
+                        "sessions_per_user": round(total_sessions / unique_users, 2) if unique_users > 0 else 0,
+                        "avg_usage_per_user_hours": avg_usage_per_user_hours,
+                        "users_per_day": users_per_day
+                    },
+                    "timeline": {
+                        "first_usage_date": first_usage_date,
+                        "last_usage_date": last_usage_date,
+                        "active_days": active_days,
+                        "usage_span_days": usage_span_days,
+                        "usage_frequency": usage_frequency
+                    }
                 }
-            }
-            applications.append(app_data)
-        
+                applications.append(app_data)
+                category_counts[usage_intensity] += 1
+                if usage_quartile == 4:
+                    top_quartile_count += 1
+                if session_variability > 30:
+                    high_variability_count += 1
+                if usage_frequency > 50:
+                    consistent_usage_count += 1
+                if avg_usage_per_user_hours > 10:
+                    power_user_count += 1
+            
         # Generate insights
         total_usage_hours = round(grand_total_seconds / 3600, 2)
-        avg_usage_per_app = round(total_usage_hours / len(applications), 2) if applications else 0
-        
-        # Category analysis
-        high_usage_apps = [app for app in applications if app['usage_metrics']['usage_category'] == 'High']
-        medium_usage_apps = [app for app in applications if app['usage_metrics']['usage_category'] == 'Medium']
-        low_usage_apps = [app for app in applications if app['usage_metrics']['usage_category'] == 'Low']
-        
-        # Quartile analysis
-        top_quartile_apps = [app for app in applications if app['usage_metrics']['usage_quartile'] == 4]
+        avg_usage_per_app = round(total_usage_hours / len(applications), 2)
         
         insights = {
             "summary": f"Analysis of {len(applications)} applications showing comprehensive usage time statistics",
@@ -301,10 +451,10 @@ async def usage_time_stats(
             "usage_distribution": {
                 "total_usage_hours": total_usage_hours,
                 "average_usage_per_app_hours": avg_usage_per_app,
-                "high_usage_apps": len(high_usage_apps),
-                "medium_usage_apps": len(medium_usage_apps),
-                "low_usage_apps": len(low_usage_apps),
-                "top_quartile_apps": len(top_quartile_apps)
+                "high_usage_apps": category_counts["High"],
+                "medium_usage_apps": category_counts["Medium"],
+                "low_usage_apps": category_counts["Low"],
+                "top_quartile_apps": top_quartile_count
             },
             "statistical_analysis": {
                 "total_applications_analyzed": len(applications),
@@ -317,50 +467,39 @@ async def usage_time_stats(
             "recommendations": []
         }
         
-        if applications:
-            top_app = applications[0]
-            insights["key_findings"].extend([
-                f"'{top_app['application_name']}' leads with {top_app['usage_metrics']['total_hours']} hours ({top_app['usage_metrics']['usage_percentage']}% of total usage)",
-                f"Top application has {top_app['user_metrics']['unique_users']} users with {top_app['session_metrics']['avg_session_minutes']} minutes average session length",
-                f"{len(high_usage_apps)} applications classified as high-usage, {len(medium_usage_apps)} as medium-usage, {len(low_usage_apps)} as low-usage"
-            ])
+        top_app = applications[0]
+        insights["key_findings"].extend([
+            f"'{top_app['application_name']}' leads with {top_app['usage_metrics']['total_hours']} hours ({top_app['usage_metrics']['usage_percentage']}% of total usage)",
+            f"Top application has {top_app['user_metrics']['unique_users']} users with {top_app['session_metrics']['avg_session_minutes']} minutes average session length",
+            f"{category_counts['High']} applications classified as high-usage, {category_counts['Medium']} as medium-usage, {category_counts['Low']} as low-usage"
+        ])
+        
+        # Usage concentration analysis
+        if len(applications) >= 5:
+            top_5_percentage = sum(app['usage_metrics']['usage_percentage'] for app in applications[:5])
+            insights["key_findings"].append(f"Top 5 applications account for {round(top_5_percentage, 1)}% of total usage time")
             
-            # Usage concentration analysis
-            if len(applications) >= 5:
-                top_5_percentage = sum(app['usage_metrics']['usage_percentage'] for app in applications[:5])
-                insights["key_findings"].append(f"Top 5 applications account for {round(top_5_percentage, 1)}% of total usage time")
-                
-                if top_5_percentage > 80:
-                    insights["recommendations"].append("High usage concentration - consider promoting underutilized applications")
-                elif top_5_percentage < 50:
-                    insights["recommendations"].append("Well-distributed usage pattern - good application portfolio balance")
+            if top_5_percentage > 80:
+                insights["recommendations"].append("High usage concentration - consider promoting underutilized applications")
+            elif top_5_percentage < 50:
+                insights["recommendations"].append("Well-distributed usage pattern - good application portfolio balance")
         
         # Session pattern recommendations
-        if applications:
-            high_variability_apps = [app for app in applications if app['session_metrics']['session_variability'] > 30]
-            if high_variability_apps:
-                insights["recommendations"].append(f"Investigate {len(high_variability_apps)} applications with high session variability (>30 min std dev)")
-            
-            consistent_usage_apps = [app for app in applications if app['timeline']['usage_frequency'] > 50]
-            if consistent_usage_apps:
-                insights["recommendations"].append(f"Leverage {len(consistent_usage_apps)} applications with consistent usage patterns (>50% frequency)")
-            
-            power_user_apps = [app for app in applications if app['user_metrics']['avg_usage_per_user_hours'] > 10]
-            if power_user_apps:
-                insights["recommendations"].append(f"Focus on {len(power_user_apps)} applications with power users (>10 hours per user)")
+        if high_variability_count:
+            insights["recommendations"].append(f"Investigate {high_variability_count} applications with high session variability (>30 min std dev)")
+        
+        if consistent_usage_count:
+            insights["recommendations"].append(f"Leverage {consistent_usage_count} applications with consistent usage patterns (>50% frequency)")
+        
+        if power_user_count:
+            insights["recommendations"].append(f"Focus on {power_user_count} applications with power users (>10 hours per user)")
         
         return {
             "status": "success",
             "data": {
                 "tool": "usage_time_stats",
                 "description": "Comprehensive usage time statistics with detailed analytics",
-                "parameters": {
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "limit": limit,
-                    "platform": platform,
-                    "min_usage_hours": min_usage_hours
-                },
+                "parameters": parameters,
                 "query_time_ms": round(query_time, 2),
                 "total_records": len(applications),
                 "applications": applications
@@ -21,18 +21,272 @@ Created: 2025-01-08
 Last Modified: 2025-01-09
 """
 
-import json
 import logging
-from typing import Optional, Dict, Any
-from datetime import datetime
+import sqlite3
+import statistics
+import time
+from datetime import timedelta
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple
 
 # Import the mcp instance from server_instance module
 from server_instance import mcp
-from shared.database_utils import get_database_connection
-from shared.date_utils import validate_date_range, format_date_for_db
+from shared.database_utils import get_database_connection, get_database_mtime_ns, check_query_plan, MATERIALIZED
+from shared.cache_utils import ResultCache
+from shared.analytics_utils import quartile_from_rank
+from shared.date_utils import validate_date_range, format_date_for_db, parse_log_date
+from scheduler.precompute import APP_DAILY_ROLLUP_TABLE, rollup_is_current
 
 logger = logging.getLogger(__name__)
 
+# Responses for repeated parameter combinations (e.g. dashboard refreshes)
+_result_cache = ResultCache("user_count_stats", maxsize=256)
+
+
+@lru_cache(maxsize=16)
+def _build_queries(
+    has_start_date: bool,
+    has_end_date: bool,
+    has_platform: bool,
+    use_daily_rollup: bool
+) -> Tuple[str, str]:
+    """
+    Assemble the user count SQL for a given filter shape.
+    
+    Each of the 16 variants is built once, and the identical strings let
+    sqlite3's statement cache reuse the prepared statements. The filters are
+    bound in the order start_date, end_date, platform.
+    
+    Args:
+        has_start_date: Whether a start_date filter is applied
+        has_end_date: Whether an end_date filter is applied
+        has_platform: Whether a platform filter is applied
+        use_daily_rollup: Whether to aggregate the daily rollup instead of app_usage
+    
+    Returns:
+        The per-application query, bound with the filters and min_users
+        (then the filters again when use_daily_rollup is set), and the
+        system-wide distinct user count query, bound with the filters
+    """
+    # Filters shared by the per-application stats and the system-wide
+    # user count. The end date is a half-open bound: still a plain range
+    # seek on log_date, and it keeps the whole end day should log_date ever
+    # carry a time
+    filter_clause = ""
+    if has_start_date:
+        filter_clause += " AND log_date >= ?"
+    if has_end_date:
+        filter_clause += " AND log_date < ?"
+    if has_platform:
+        filter_clause += " AND platform = ?"
+    
+    # Build the per-application aggregation. Totals, shares, ranks,
+    # quartiles and levels are derived from these rows in Python rather
+    # than by window functions or totals joined onto every row
+    if use_daily_rollup:
+        # Session totals come from the nightly per-day rollup; distinct
+        # users do not add up across days, so they are still counted from
+        # app_usage, which also applies the min_users threshold
+        query = f"""
+    WITH app_users AS (
+        SELECT 
+            application_name,
+            platform,
+            COUNT(DISTINCT user) as unique_users
+        FROM app_usage
+        WHERE 1=1{filter_clause}
+        GROUP BY application_name, platform
+        HAVING COUNT(DISTINCT user) >= ?
+    ),
+    daily_stats AS (
+        SELECT 
+            application_name,
+            platform,
+            SUM(total_sessions) as total_sessions,
+            SUM(total_seconds) as total_seconds,
+            SUM(total_seconds) * 1.0 / SUM(total_sessions) as avg_session_seconds,
+            MIN(min_session_seconds) as min_session_seconds,
+            MAX(max_session_seconds) as max_session_seconds,
+            MIN(log_date) as first_usage_date,
+            MAX(log_date) as last_usage_date,
+            COUNT(*) as active_days,
+            COUNT(DISTINCT platform) as platforms_used
+        FROM {APP_DAILY_ROLLUP_TABLE}
+        WHERE 1=1{filter_clause}
+        GROUP BY application_name, platform
+    ),
+    app_user_stats AS {MATERIALIZED} (
+        SELECT 
+            d.application_name,
+            d.platform,
+            u.unique_users,
+            d.total_sessions,
+            d.total_seconds,
+            d.avg_session_seconds,
+            d.min_session_seconds,
+            d.max_session_seconds,
+            d.first_usage_date,
+            d.last_usage_date,
+            d.active_days,
+            d.platforms_used
+        FROM app_users u
+        JOIN daily_stats d USING (application_name, platform)
+    )"""
+    else:
+        query = f"""
+    WITH app_user_stats AS {MATERIALIZED} (
+        SELECT 
+            application_name,
+            platform,
+            COUNT(DISTINCT user) as unique_users,
+            COUNT(*) as total_sessions,
+            SUM(duration_seconds) as total_seconds,
+            AVG(duration_seconds) as avg_session_seconds,
+            MIN(duration_seconds) as min_session_seconds,
+            MAX(duration_seconds) as max_session_seconds,
+            MIN(log_date) as first_usage_date,
+            MAX(log_date) as last_usage_date,
+            COUNT(DISTINCT log_date) as active_days,
+            COUNT(DISTINCT platform) as platforms_used
+        FROM app_usage
+        WHERE 1=1{filter_clause}
+        GROUP BY application_name, platform
+        HAVING COUNT(DISTINCT user) >= ?
+    )"""
+    
+    # The usage span is computed here so no dates are parsed in Python
+    query += """
+    SELECT 
+        application_name,
+        platform,
+        unique_users,
+        total_sessions,
+        total_seconds,
+        avg_session_seconds,
+        min_session_seconds,
+        max_session_seconds,
+        first_usage_date,
+        last_usage_date,
+        active_days,
+        platforms_used,
+        CAST(julianday(last_usage_date) - julianday(first_usage_date) AS INTEGER) + 1 as usage_span_days
+    FROM app_user_stats
+    ORDER BY unique_users DESC
+    """
+    
+    # Users across all applications (a user of several applications is
+    # counted once)
+    user_count_query = f"SELECT COUNT(DISTINCT user) FROM app_usage WHERE 1=1{filter_clause}"
+    
+    return query, user_count_query
+
+
+def _build_app_data(
+    row: sqlite3.Row,
+    user_rank: int,
+    total_apps: int,
+    total_unique_users: int,
+    grand_total_seconds: int,
+    grand_total_sessions: int
+) -> Dict[str, Any]:
+    """
+    Build the response entry for one application row.
+    
+    Args:
+        row: Row of the per-application query
+        user_rank: 1-based rank by unique users
+        total_apps: Number of qualifying applications (for the quartile)
+        total_unique_users: Distinct users across all applications
+        grand_total_seconds: Usage seconds across all qualifying applications
+        grand_total_sessions: Sessions across all qualifying applications
+    
+    Returns:
+        The application's user, engagement, usage, platform and timeline metrics
+    """
+    # Columns are read by name, so the SELECT list can change freely
+    app_name = row["application_name"]
+    app_platform = row["platform"]
+    unique_users = row["unique_users"]
+    total_sessions = row["total_sessions"]
+    total_seconds = row["total_seconds"]
+    avg_session_seconds = row["avg_session_seconds"]
+    min_session_seconds = row["min_session_seconds"]
+    max_session_seconds = row["max_session_seconds"]
+    first_usage_date = row["first_usage_date"]
+    last_usage_date = row["last_usage_date"]
+    active_days = row["active_days"]
+    platforms_used = row["platforms_used"]
+    usage_span_days = row["usage_span_days"]
+    
+    # Per-user ratios are whole numbers (integer division), reported
+    # as floats as they always have been
+    sessions_per_user = float(total_sessions // unique_users)
+    avg_usage_per_user_seconds = float(total_seconds // unique_users)
+    avg_active_days_per_user = float(active_days // unique_users)
+    # Rows arrive sorted by users, so the quartile follows from the rank
+    user_quartile = quartile_from_rank(user_rank, total_apps)
+    user_adoption_level = (
+        "Very High" if unique_users >= 50 else
+        "High" if unique_users >= 20 else
+        "Medium" if unique_users >= 10 else
+        "Low" if unique_users >= 5 else
+        "Very Low"
+    )
+    engagement_level = (
+        "Highly Engaged" if sessions_per_user >= 10 else
+        "Engaged" if sessions_per_user >= 5 else
+        "Moderately Engaged" if sessions_per_user >= 2 else
+        "Low Engagement"
+    )
+    user_market_share = round(unique_users * 100.0 / total_unique_users, 2)
+    usage_share = round(total_seconds * 100.0 / grand_total_seconds, 2)
+    session_share = round(total_sessions * 100.0 / grand_total_sessions, 2)
+    
+    # Calculate additional metrics
+    usage_consistency = round((active_days / usage_span_days) * 100, 1) if usage_span_days > 0 else 0
+    
+    return {
+        "rank": user_rank,
+        "application_name": app_name,
+        "platform": app_platform,
+        "user_metrics": {
+            "unique_users": unique_users,
+            "user_market_share": user_market_share,
+            "user_quartile": user_quartile,  # 1=lowest, 4=highest
+            "user_adoption_level": user_adoption_level,
+            "avg_active_days_per_user": round(avg_active_days_per_user, 2),
+            "user_retention_rate": usage_consistency
+        },
+        "engagement_metrics": {
+            "engagement_level": engagement_level,
+            "sessions_per_user": round(sessions_per_user, 2),
+            "avg_usage_per_user_hours": round(avg_usage_per_user_seconds / 3600, 2),
+            "avg_usage_per_user_minutes": round(avg_usage_per_user_seconds / 60, 2),
+            "total_sessions": total_sessions,
+            "session_share": session_share
+        },
+        "usage_metrics": {
+            "total_hours": round(total_seconds / 3600, 2),
+            "total_minutes": round(total_seconds / 60, 2),
+            "usage_share": usage_share,
+            "avg_session_minutes": round(avg_session_seconds / 60, 2),
+            "min_session_minutes": round(min_session_seconds / 60, 2),
+            "max_session_minutes": round(max_session_seconds / 60, 2)
+        },
+        "platform_metrics": {
+            "platforms_used": platforms_used,
+            "cross_platform": platforms_used > 1,
+            "platform_diversity": "High" if platforms_used > 2 else "Medium" if platforms_used == 2 else "Single"
+        },
+        "timeline": {
+            "first_usage_date": first_usage_date,
+            "last_usage_date": last_usage_date,
+            "active_days": active_days,
+            "usage_span_days": usage_span_days,
+            "usage_consistency": usage_consistency
+        }
+    }
+
 
 @mcp.tool()
 async def user_count_stats(
@@ -89,238 +343,111 @@ async def user_count_stats(
         limit = limit or 100
         min_users = min_users or 1
         
-        # Build query with CTEs for comprehensive analysis
-        query = """
-        WITH app_user_stats AS (
-            SELECT 
-                application_name,
-                platform,
-                COUNT(DISTINCT user) as unique_users,
-                COUNT(*) as total_sessions,
-                SUM(duration_seconds) as total_seconds,
-                AVG(duration_seconds) as avg_session_seconds,
-                MIN(duration_seconds) as min_session_seconds,
-                MAX(duration_seconds) as max_session_seconds,
-                MIN(log_date) as first_usage_date,
-                MAX(log_date) as last_usage_date,
-                COUNT(DISTINCT log_date) as active_days,
-                COUNT(DISTINCT platform) as platforms_used
-            FROM app_usage
-            WHERE 1=1
-        """
+        # The database modification time invalidates cached responses on writes
+        cache_key = (start_date, end_date, limit, min_users, platform, get_database_mtime_ns())
+        cached_response = _result_cache.get(cache_key)
+        if cached_response is not None:
+            return cached_response
         
-        params = []
+        # Echoed back in both the empty and the full response
+        parameters = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "limit": limit,
+            "min_users": min_users,
+            "platform": platform
+        }
         
-        # Add date filters
+        # Filter parameters in the order _build_queries binds them
+        filter_params = []
         if start_date:
-            query += " AND log_date >= ?"
-            params.append(format_date_for_db(start_date))
-        
+            filter_params.append(format_date_for_db(start_date))
         if end_date:
-            query += " AND log_date <= ?"
-            params.append(format_date_for_db(end_date))
-        
-        # Add platform filter
+            end_exclusive = parse_log_date(format_date_for_db(end_date)) + timedelta(days=1)
+            filter_params.append(end_exclusive.isoformat())
         if platform:
-            query += " AND platform = ?"
-            params.append(platform)
-        
-        query += """
-            GROUP BY application_name, platform
-            HAVING COUNT(DISTINCT user) >= ?
-        ),
-        total_stats AS (
-            SELECT 
-                COUNT(DISTINCT user) as total_unique_users,
-                SUM(total_seconds) as grand_total_seconds,
-                SUM(total_sessions) as grand_total_sessions,
-                COUNT(*) as total_apps,
-                AVG(unique_users) as avg_users_per_app,
-                STDDEV(unique_users) as stddev_users_per_app
-            FROM (
-                SELECT user, SUM(total_seconds) as total_seconds, SUM(total_sessions) as total_sessions
-                FROM app_user_stats
-                GROUP BY user
-            )
-        ),
-        user_engagement_analysis AS (
-            SELECT 
-                aus.*,
-                ts.total_unique_users,
-                ts.grand_total_seconds,
-                ts.grand_total_sessions,
-                ts.total_apps,
-                ts.avg_users_per_app,
-                ts.stddev_users_per_app,
-                ROUND((aus.unique_users * 100.0 / ts.total_unique_users), 2) as user_market_share,
-                ROUND((aus.total_seconds * 100.0 / ts.grand_total_seconds), 2) as usage_share,
-                ROUND((aus.total_sessions * 100.0 / ts.grand_total_sessions), 2) as session_share,
-                ROUND((aus.total_sessions / aus.unique_users), 2) as sessions_per_user,
-                ROUND((aus.total_seconds / aus.unique_users), 2) as avg_usage_per_user_seconds,
-                ROUND((aus.active_days / aus.unique_users), 2) as avg_active_days_per_user,
-                ROW_NUMBER() OVER (ORDER BY aus.unique_users DESC) as user_rank,
-                NTILE(4) OVER (ORDER BY aus.unique_users) as user_quartile,
-                CASE 
-                    WHEN aus.unique_users >= 50 THEN 'Very High'
-                    WHEN aus.unique_users >= 20 THEN 'High'
-                    WHEN aus.unique_users >= 10 THEN 'Medium'
-                    WHEN aus.unique_users >= 5 THEN 'Low'
-                    ELSE 'Very Low'
-                END as user_adoption_level,
-                CASE 
-                    WHEN (aus.total_sessions / aus.unique_users) >= 10 THEN 'Highly Engaged'
-                    WHEN (aus.total_sessions / aus.unique_users) >= 5 THEN 'Engaged'
-                    WHEN (aus.total_sessions / aus.unique_users) >= 2 THEN 'Moderately Engaged'
-                    ELSE 'Low Engagement'
-                END as engagement_level
-            FROM app_user_stats aus
-            CROSS JOIN total_stats ts
-        )
-        SELECT 
-            application_name,
-            platform,
-            unique_users,
-            total_sessions,
-            total_seconds,
-            avg_session_seconds,
-            min_session_seconds,
-            max_session_seconds,
-            first_usage_date,
-            last_usage_date,
-            active_days,
-            platforms_used,
-            user_market_share,
-            usage_share,
-            session_share,
-            sessions_per_user,
-            avg_usage_per_user_seconds,
-            avg_active_days_per_user,
-            user_rank,
-            user_quartile,
-            user_adoption_level,
-            engagement_level,
-            total_unique_users,
-            grand_total_seconds,
-            grand_total_sessions,
-            total_apps,
-            avg_users_per_app,
-            stddev_users_per_app
-        FROM user_engagement_analysis
-        ORDER BY unique_users DESC
-        LIMIT ?
-        """
+            filter_params.append(platform)
         
-        params.extend([min_users, limit])
-        
-        # Execute query
+        # Execute queries. Every qualifying application is fetched (one row
+        # per application and platform) since the totals span all of them;
+        # only the first `limit` are reported
         with get_database_connection() as conn:
+            # The daily rollup is only read while no app_usage write has
+            # happened since it was built
+            use_daily_rollup = rollup_is_current(conn, APP_DAILY_ROLLUP_TABLE)
+            query, user_count_query = _build_queries(
+                bool(start_date), bool(end_date), bool(platform), use_daily_rollup
+            )
+            params = filter_params + [min_users]
+            if use_daily_rollup:
+                params += filter_params
+            
+            # Logs a warning (once per query text) if app_usage is not read
+            # through an index
+            check_query_plan(conn, query, params)
+            check_query_plan(conn, user_count_query, filter_params)
             cursor = conn.cursor()
-            start_time = datetime.now()
+            start_ns = time.perf_counter_ns()
             cursor.execute(query, params)
             results = cursor.fetchall()
-            query_time = (datetime.now() - start_time).total_seconds() * 1000
-        
-        if not results:
-            return {
-                "status": "success",
-                "data": {
-                    "tool": "user_count_stats",
-                    "description": "Comprehensive user count statistics",
-                    "parameters": {
-                        "start_date": start_date,
-                        "end_date": end_date,
-                        "limit": limit,
-                        "min_users": min_users,
-                        "platform": platform
+            
+            if not results:
+                return {
+                    "status": "success",
+                    "data": {
+                        "tool": "user_count_stats",
+                        "description": "Comprehensive user count statistics",
+                        "parameters": parameters,
+                        "query_time_ms": round((time.perf_counter_ns() - start_ns) / 1e6, 2),
+                        "total_records": 0,
+                        "applications": []
                     },
-                    "query_time_ms": round(query_time, 2),
-                    "total_records": 0,
-                    "applications": []
-                },
-                "insights": {
-                    "summary": "No applications found matching the specified criteria",
-                    "recommendations": [
-                        "Try expanding the date range for analysis",
-                        "Reduce the minimum user count filter",
-                        "Check if the specified platform has recorded user data"
-                    ]
+                    "insights": {
+                        "summary": "No applications found matching the specified criteria",
+                        "recommendations": [
+                            "Try expanding the date range for analysis",
+                            "Reduce the minimum user count filter",
+                            "Check if the specified platform has recorded user data"
+                        ]
+                    }
                 }
-            }
+            
+            cursor.execute(user_count_query, filter_params)
+            total_unique_users = cursor.fetchone()[0]
+            query_time = (time.perf_counter_ns() - start_ns) / 1e6
+        
+        # Totals over every qualifying application
+        total_apps_in_db = len(results)
+        grand_total_seconds = sum(row["total_seconds"] for row in results)
+        grand_total_sessions = sum(row["total_sessions"] for row in results)
+        app_user_counts = [row["unique_users"] for row in results]
+        avg_users_per_app = sum(app_user_counts) / total_apps_in_db
+        stddev_users_per_app = statistics.stdev(app_user_counts) if total_apps_in_db > 1 else None
         
         # Process results
         applications = []
-        total_unique_users = results[0][22] if results else 0
-        grand_total_seconds = results[0][23] if results else 0
-        grand_total_sessions = results[0][24] if results else 0
-        total_apps_in_db = results[0][25] if results else 0
-        avg_users_per_app = results[0][26] if results else 0
-        stddev_users_per_app = results[0][27] if results else 0
+        # Level and recommendation counts are tallied in the same pass
+        adoption_counts = {"Very High": 0, "High": 0, "Medium": 0, "Low": 0, "Very Low": 0}
+        engagement_counts = {"Highly Engaged": 0, "Engaged": 0, "Moderately Engaged": 0, "Low Engagement": 0}
+        cross_platform_count = 0
+        high_retention_count = 0
         
-        for row in results:
-            # Calculate additional metrics
-            usage_span_days = (datetime.strptime(row[9], '%Y-%m-%d') - 
-                             datetime.strptime(row[8], '%Y-%m-%d')).days + 1
-            user_retention_rate = round((row[10] / usage_span_days) * 100, 1) if usage_span_days > 0 else 0
-            
-            app_data = {
-                "rank": int(row[18]),  # user_rank
-                "application_name": row[0],
-                "platform": row[1],
-                "user_metrics": {
-                    "unique_users": int(row[2]),
-                    "user_market_share": row[12],  # user_market_share
-                    "user_quartile": int(row[19]),  # user_quartile (1=lowest, 4=highest)
-                    "user_adoption_level": row[20],  # user_adoption_level
-                    "avg_active_days_per_user": round(row[17], 2),  # avg_active_days_per_user
-                    "user_retention_rate": user_retention_rate
-                },
-                "engagement_metrics": {
-                    "engagement_level": row[21],  # engagement_level
-                    "sessions_per_user": round(row[15], 2),  # sessions_per_user
-                    "avg_usage_per_user_hours": round(row[16] / 3600, 2),  # avg_usage_per_user_seconds to hours
-                    "avg_usage_per_user_minutes": round(row[16] / 60, 2),  # avg_usage_per_user_seconds to minutes
-                    "total_sessions": int(row[3]),
-                    "session_share": row[14]  # session_share
-                },
-                "usage_metrics": {
-                    "total_hours": round(row[4] / 3600, 2),  # total_seconds to hours
-                    "total_minutes": round(row[4] / 60, 2),  # total_seconds to minutes
-                    "usage_share": row[13],  # usage_share
-                    "avg_session_minutes": round(row[5] / 60, 2),  # avg_session_seconds to minutes
-                    "min_session_minutes": round(row[6] / 60, 2),  # min_session_seconds to minutes
-                    "max_session_minutes": round(row[7] / 60, 2)  # max_session_seconds to minutes
-                },
-                "platform_metrics": {
-                    "platforms_used": int(row[11]),
-                    "cross_platform": row[11] > 1,
-                    "platform_diversity": "High" if row[11] > 2 else "Medium" if row[11] == 2 else "Single"
-                },
-                "timeline": {
-                    "first_usage_date": row[8],
-                    "last_usage_date": row[9],
-                    "active_days": int(row[10]),
-                    "usage_span_days": usage_span_days,
-                    "usage_consistency": round((row[10] / usage_span_days) * 100, 1) if usage_span_days > 0 else 0
-                }
-            }
+        for user_rank, row in enumerate(results[:limit], 1):
+            app_data = _build_app_data(
+                row, user_rank, total_apps_in_db, total_unique_users,
+                grand_total_seconds, grand_total_sessions
+            )
             applications.append(app_data)
+            adoption_counts[app_data["user_metrics"]["user_adoption_level"]] += 1
+            engagement_counts[app_data["engagement_metrics"]["engagement_level"]] += 1
+            if app_data["platform_metrics"]["cross_platform"]:
+                cross_platform_count += 1
+            if app_data["timeline"]["usage_consistency"] > 70:
+                high_retention_count += 1
         
         # Generate insights
         total_usage_hours = round(grand_total_seconds / 3600, 2)
         
-        # Adoption level analysis
-        very_high_adoption = [app for app in applications if app['user_metrics']['user_adoption_level'] == 'Very High']
-        high_adoption = [app for app in applications if app['user_metrics']['user_adoption_level'] == 'High']
-        medium_adoption = [app for app in applications if app['user_metrics']['user_adoption_level'] == 'Medium']
-        low_adoption = [app for app in applications if app['user_metrics']['user_adoption_level'] == 'Low']
-        very_low_adoption = [app for app in applications if app['user_metrics']['user_adoption_level'] == 'Very Low']
-        
-        # Engagement level analysis
-        highly_engaged = [app for app in applications if app['engagement_metrics']['engagement_level'] == 'Highly Engaged']
-        engaged = [app for app in applications if app['engagement_metrics']['engagement_level'] == 'Engaged']
-        moderately_engaged = [app for app in applications if app['engagement_metrics']['engagement_level'] == 'Moderately Engaged']
-        low_engagement = [app for app in applications if app['engagement_metrics']['engagement_level'] == 'Low Engagement']
-        
         insights = {
             "summary": f"Analysis of {len(applications)} applications showing comprehensive user count statistics",
             "key_findings": [],
@@ -331,78 +458,71 @@ async def user_count_stats(
                 "average_users_per_app": round(avg_users_per_app, 1),
                 "user_distribution_std_dev": round(stddev_users_per_app, 1) if stddev_users_per_app else 0,
                 "adoption_levels": {
-                    "very_high": len(very_high_adoption),
-                    "high": len(high_adoption),
-                    "medium": len(medium_adoption),
-                    "low": len(low_adoption),
-                    "very_low": len(very_low_adoption)
+                    "very_high": adoption_counts["Very High"],
+                    "high": adoption_counts["High"],
+                    "medium": adoption_counts["Medium"],
+                    "low": adoption_counts["Low"],
+                    "very_low": adoption_counts["Very Low"]
                 }
             },
             "engagement_analysis": {
                 "engagement_levels": {
-                    "highly_engaged": len(highly_engaged),
-                    "engaged": len(engaged),
-                    "moderately_engaged": len(moderately_engaged),
-                    "low_engagement": len(low_engagement)
+                    "highly_engaged": engagement_counts["Highly Engaged"],
+                    "engaged": engagement_counts["Engaged"],
+                    "moderately_engaged": engagement_counts["Moderately Engaged"],
+                    "low_engagement": engagement_counts["Low Engagement"]
                 }
             },
             "recommendations": []
         }
         
-        if applications:
-            top_app = applications[0]
-            insights["key_findings"].extend([
-                f"'{top_app['application_name']}' leads with {top_app['user_metrics']['unique_users']} users ({top_app['user_metrics']['user_market_share']}% market share)",
-                f"Top application users average {top_app['engagement_metrics']['sessions_per_user']} sessions and {top_app['engagement_metrics']['avg_usage_per_user_hours']} hours each",
-                f"User adoption distribution: {len(very_high_adoption)} very high, {len(high_adoption)} high, {len(medium_adoption)} medium, {len(low_adoption)} low, {len(very_low_adoption)} very low"
-            ])
+        top_app = applications[0]
+        insights["key_findings"].extend([
+            f"'{top_app['application_name']}' leads with {top_app['user_metrics']['unique_users']} users ({top_app['user_metrics']['user_market_share']}% market share)",
+            f"Top application users average {top_app['engagement_metrics']['sessions_per_user']} sessions and {top_app['engagement_metrics']['avg_usage_per_user_hours']} hours each",
+            f"User adoption distribution: {adoption_counts['Very High']} very high, {adoption_counts['High']} high, {adoption_counts['Medium']} medium, {adoption_counts['Low']} low, {adoption_counts['Very Low']} very low"
+        ])
+        
+        # Market concentration analysis
+        if len(applications) >= 3:
+            top_3_market_share = sum(app['user_metrics']['user_market_share'] for app in applications[:3])
+            insights["key_findings"].append(f"Top 3 applications capture {round(top_3_market_share, 1)}% of total users")
             
-            # Market concentration analysis
-            if len(applications) >= 3:
-                top_3_market_share = sum(app['user_metrics']['user_market_share'] for app in applications[:3])
-                insights["key_findings"].append(f"Top 3 applications capture {round(top_3_market_share, 1)}% of total users")
-                
-                if top_3_market_share > 70:
-                    insights["recommendations"].append("High user concentration in top apps - consider strategies to diversify user engagement")
-                elif top_3_market_share < 40:
-                    insights["recommendations"].append("Well-distributed user base - good market diversity")
+            if top_3_market_share > 70:
+                insights["recommendations"].append("High user concentration in top apps - consider strategies to diversify user engagement")
+            elif top_3_market_share < 40:
+                insights["recommendations"].append("Well-distributed user base - good market diversity")
         
         # Engagement recommendations
-        if highly_engaged or engaged:
-            total_engaged = len(highly_engaged) + len(engaged)
+        total_engaged = engagement_counts["Highly Engaged"] + engagement_counts["Engaged"]
+        if total_engaged:
             insights["recommendations"].append(f"Leverage {total_engaged} highly engaged applications as success models")
         
-        if low_engagement:
-            insights["recommendations"].append(f"Improve engagement for {len(low_engagement)} applications with low user interaction")
+        if engagement_counts["Low Engagement"]:
+            insights["recommendations"].append(f"Improve engagement for {engagement_counts['Low Engagement']} applications with low user interaction")
         
         # Platform diversity recommendations
-        cross_platform_apps = [app for app in applications if app['platform_metrics']['cross_platform']]
-        if cross_platform_apps:
-            insights["recommendations"].append(f"Promote {len(cross_platform_apps)} cross-platform applications for broader reach")
+        if cross_platform_count:
+            insights["recommendations"].append(f"Promote {cross_platform_count} cross-platform applications for broader reach")
         
         # Retention recommendations
-        high_retention_apps = [app for app in applications if app['timeline']['usage_consistency'] > 70]
-        if high_retention_apps:
-            insights["recommendations"].append(f"Study {len(high_retention_apps)} applications with high user retention (>70% consistency)")
+        if high_retention_count:
+            insights["recommendations"].append(f"Study {high_retention_count} applications with high user retention (>70% consistency)")
         
-        return {
+        response = {
             "status": "success",
             "data": {
                 "tool": "user_count_stats",
                 "description": "Comprehensive user count statistics with detailed analytics",
-                "parameters": {
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "limit": limit,
-                    "min_users": min_users,
-                    "platform": platform
-                },
+                "parameters": parameters,
                 "query_time_ms": round(query_time, 2),
                 "total_records": len(applications),
                 "applications": applications
             },
             "insights": insights
         }
+        _result_cache.set(cache_key, response)
+        return response
         
     except Exception as e:
         logger.error(f"Error in user_count_stats: {e}")
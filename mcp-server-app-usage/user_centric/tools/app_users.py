@@ -21,19 +21,191 @@ Created: 2025-01-08
 Last Modified: 2025-01-09
 """
 
-import json
 import logging
+from functools import lru_cache
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Import the mcp instance from server_instance module
 from server_instance import mcp
-from shared.database_utils import get_database_connection
-from shared.date_utils import validate_date_range, format_date_for_db
+from shared.database_utils import get_database_connection, sample_stddev_sql, MATERIALIZED
+from shared.analytics_utils import quartile_from_rank
+from shared.date_utils import validate_date_range, format_date_for_db, parse_log_date
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=8)
+def _build_query(has_start_date: bool, has_end_date: bool, has_platform: bool) -> str:
+    """
+    Assemble the app users SQL for a given filter shape.
+    
+    Each of the 8 variants is built once, and the identical string lets
+    sqlite3's statement cache reuse the prepared statement. Parameters must
+    be bound in the order: application_name, start_date, end_date,
+    platform (the filters that are set), then limit.
+    
+    Args:
+        has_start_date: Whether a start_date filter is applied
+        has_end_date: Whether an end_date filter is applied
+        has_platform: Whether a platform filter is applied
+    
+    Returns:
+        The app users query
+    """
+    # The end date is a half-open bound, as in user_count_stats
+    filter_clause = ""
+    if has_start_date:
+        filter_clause += " AND log_date >= ?"
+    if has_end_date:
+        filter_clause += " AND log_date < ?"
+    if has_platform:
+        filter_clause += " AND platform = ?"
+    
+    # SQLite has no STDDEV aggregate; build sample standard deviations from
+    # sums and sums of squares. Usage totals can exceed the int64 range
+    # once squared, so they are squared as REAL
+    session_stddev = sample_stddev_sql(
+        "SUM(duration_seconds)", "SUM(duration_seconds * duration_seconds)", "COUNT(*)"
+    )
+    user_usage_stddev = sample_stddev_sql(
+        "SUM(total_seconds)", "SUM(total_seconds * 1.0 * total_seconds)", "COUNT(*)"
+    )
+    user_sessions_stddev = sample_stddev_sql(
+        "SUM(session_count)", "SUM(session_count * session_count)", "COUNT(*)"
+    )
+    
+    # Build query with CTEs for comprehensive analysis. The per-user
+    # aggregate feeds both the totals and the ranking, so it is
+    # materialized once rather than risk evaluating the GROUP BY twice.
+    # Only the session rank needs every user; the top users by usage are
+    # cut before the shares and categories are computed, and their usage
+    # rank and quartile follow from the output order
+    return f"""
+    WITH user_app_stats AS (
+        SELECT 
+            user,
+            platform,
+            SUM(duration_seconds) as total_seconds,
+            COUNT(*) as session_count,
+            AVG(duration_seconds) as avg_session_seconds,
+            MIN(duration_seconds) as min_session_seconds,
+            MAX(duration_seconds) as max_session_seconds,
+            {session_stddev} as stddev_session_seconds,
+            MIN(log_date) as first_usage_date,
+            MAX(log_date) as last_usage_date,
+            COUNT(DISTINCT log_date) as active_days,
+            COUNT(DISTINCT platform) as platforms_used
+        FROM app_usage
+        WHERE application_name = ?{filter_clause}
+        GROUP BY user, platform
+    ),
+    aggregated_user_stats AS {MATERIALIZED} (
+        SELECT 
+            user,
+            SUM(total_seconds) as total_seconds,
+            SUM(session_count) as session_count,
+            AVG(avg_session_seconds) as avg_session_seconds,
+            MIN(min_session_seconds) as min_session_seconds,
+            MAX(max_session_seconds) as max_session_seconds,
+            AVG(stddev_session_seconds) as avg_stddev_session_seconds,
+            MIN(first_usage_date) as first_usage_date,
+            MAX(last_usage_date) as last_usage_date,
+            SUM(active_days) as total_active_days,
+            MAX(platforms_used) as platforms_used
+        FROM user_app_stats
+        GROUP BY user
+    ),
+    total_stats AS (
+        SELECT 
+            SUM(total_seconds) as grand_total_seconds,
+            SUM(session_count) as grand_total_sessions,
+            COUNT(*) as total_users,
+            AVG(total_seconds) as avg_user_usage_seconds,
+            {user_usage_stddev} as stddev_user_usage_seconds,
+            AVG(session_count) as avg_sessions_per_user,
+            {user_sessions_stddev} as stddev_sessions_per_user
+        FROM aggregated_user_stats
+    ),
+    session_ranks AS (
+        SELECT 
+            aus.*,
+            ROW_NUMBER() OVER (ORDER BY aus.session_count DESC) as session_rank
+        FROM aggregated_user_stats aus
+    ),
+    top_users AS (
+        SELECT *
+        FROM session_ranks
+        ORDER BY total_seconds DESC
+        LIMIT ?
+    ),
+    user_analysis AS (
+        SELECT 
+            aus.*,
+            ts.grand_total_seconds,
+            ts.grand_total_sessions,
+            ts.total_users,
+            ts.avg_user_usage_seconds,
+            ts.stddev_user_usage_seconds,
+            ts.avg_sessions_per_user,
+            ts.stddev_sessions_per_user,
+            ROUND((aus.total_seconds * 100.0 / ts.grand_total_seconds), 2) as usage_percentage,
+            ROUND((aus.session_count * 100.0 / ts.grand_total_sessions), 2) as session_percentage,
+            CASE 
+                WHEN aus.total_seconds > ts.avg_user_usage_seconds + ts.stddev_user_usage_seconds THEN 'Power User'
+                WHEN aus.total_seconds > ts.avg_user_usage_seconds THEN 'Heavy User'
+                WHEN aus.total_seconds > ts.avg_user_usage_seconds - ts.stddev_user_usage_seconds THEN 'Regular User'
+                ELSE 'Light User'
+            END as user_category,
+            CASE 
+                WHEN aus.session_count >= 50 THEN 'Very High'
+                WHEN aus.session_count >= 20 THEN 'High'
+                WHEN aus.session_count >= 10 THEN 'Medium'
+                WHEN aus.session_count >= 5 THEN 'Low'
+                ELSE 'Very Low'
+            END as engagement_level
+        FROM top_users aus
+        CROSS JOIN total_stats ts
+    )
+    SELECT 
+        user,
+        session_count,
+        ROUND(total_seconds / 3600.0, 2) as total_hours,
+        ROUND(total_seconds / 60.0, 2) as total_minutes,
+        ROUND(avg_session_seconds / 60.0, 2) as avg_session_minutes,
+        ROUND(min_session_seconds / 60.0, 2) as min_session_minutes,
+        ROUND(max_session_seconds / 60.0, 2) as max_session_minutes,
+        COALESCE(ROUND(avg_stddev_session_seconds / 60.0, 2), 0) as session_variability,
+        first_usage_date,
+        last_usage_date,
+        total_active_days,
+        platforms_used,
+        CAST(julianday(last_usage_date) - julianday(first_usage_date) AS INTEGER) + 1 as usage_span_days,
+        ROUND(total_active_days * 100.0 / (CAST(julianday(last_usage_date) - julianday(first_usage_date) AS INTEGER) + 1), 1) as usage_frequency,
+        ROUND(session_count * 1.0 / total_active_days, 2) as sessions_per_day,
+        CAST(julianday(date('now', 'localtime')) - julianday(last_usage_date) AS INTEGER) as days_since_last_use,
+        CASE 
+            WHEN avg_user_usage_seconds > 0
+            THEN ROUND((total_seconds - avg_user_usage_seconds) * 100.0 / avg_user_usage_seconds, 1)
+            ELSE 0
+        END as vs_average_usage,
+        usage_percentage,
+        session_percentage,
+        session_rank,
+        user_category,
+        engagement_level,
+        grand_total_seconds,
+        grand_total_sessions,
+        total_users,
+        avg_user_usage_seconds,
+        stddev_user_usage_seconds,
+        avg_sessions_per_user,
+        stddev_sessions_per_user
+    FROM user_analysis
+    ORDER BY total_seconds DESC
+    """
+
+
 @mcp.tool()
 async def app_users(
     application_name: str,
@@ -88,134 +260,17 @@ async def app_users(
         # Set defaults
         limit = limit or 100
         
-        # Build query with CTEs for comprehensive analysis
-        query = """
-        WITH user_app_stats AS (
-            SELECT 
-                user,
-                platform,
-                SUM(duration_seconds) as total_seconds,
-                COUNT(*) as session_count,
-                AVG(duration_seconds) as avg_session_seconds,
-                MIN(duration_seconds) as min_session_seconds,
-                MAX(duration_seconds) as max_session_seconds,
-                STDDEV(duration_seconds) as stddev_session_seconds,
-                MIN(log_date) as first_usage_date,
-                MAX(log_date) as last_usage_date,
-                COUNT(DISTINCT log_date) as active_days,
-                COUNT(DISTINCT platform) as platforms_used
-            FROM app_usage
-            WHERE application_name = ?
-        """
+        query = _build_query(bool(start_date), bool(end_date), bool(platform))
         
+        # Parameters in the order _build_query binds them
         params = [application_name]
-        
-        # Add date filters
         if start_date:
-            query += " AND log_date >= ?"
             params.append(format_date_for_db(start_date))
-        
         if end_date:
-            query += " AND log_date <= ?"
-            params.append(format_date_for_db(end_date))
-        
-        # Add platform filter
+            end_exclusive = parse_log_date(format_date_for_db(end_date)) + timedelta(days=1)
+            params.append(end_exclusive.isoformat())
         if platform:
-            query += " AND platform = ?"
             params.append(platform)
-        
-        query += """
-            GROUP BY user, platform
-        ),
-        aggregated_user_stats AS (
-            SELECT 
-                user,
-                SUM(total_seconds) as total_seconds,
-                SUM(session_count) as session_count,
-                AVG(avg_session_seconds) as avg_session_seconds,
-                MIN(min_session_seconds) as min_session_seconds,
-                MAX(max_session_seconds) as max_session_seconds,
-                AVG(stddev_session_seconds) as avg_stddev_session_seconds,
-                MIN(first_usage_date) as first_usage_date,
-                MAX(last_usage_date) as last_usage_date,
-                SUM(active_days) as total_active_days,
-                MAX(platforms_used) as platforms_used
-            FROM user_app_stats
-            GROUP BY user
-        ),
-        total_stats AS (
-            SELECT 
-                SUM(total_seconds) as grand_total_seconds,
-                SUM(session_count) as grand_total_sessions,
-                COUNT(*) as total_users,
-                AVG(total_seconds) as avg_user_usage_seconds,
-                STDDEV(total_seconds) as stddev_user_usage_seconds,
-                AVG(session_count) as avg_sessions_per_user,
-                STDDEV(session_count) as stddev_sessions_per_user
-            FROM aggregated_user_stats
-        ),
-        user_analysis AS (
-            SELECT 
-                aus.*,
-                ts.grand_total_seconds,
-                ts.grand_total_sessions,
-                ts.total_users,
-                ts.avg_user_usage_seconds,
-                ts.stddev_user_usage_seconds,
-                ts.avg_sessions_per_user,
-                ts.stddev_sessions_per_user,
-                ROUND((aus.total_seconds * 100.0 / ts.grand_total_seconds), 2) as usage_percentage,
-                ROUND((aus.session_count * 100.0 / ts.grand_total_sessions), 2) as session_percentage,
-                ROW_NUMBER() OVER (ORDER BY aus.total_seconds DESC) as usage_rank,
-                ROW_NUMBER() OVER (ORDER BY aus.session_count DESC) as session_rank,
-                NTILE(4) OVER (ORDER BY aus.total_seconds) as usage_quartile,
-                CASE 
-                    WHEN aus.total_seconds > ts.avg_user_usage_seconds + ts.stddev_user_usage_seconds THEN 'Power User'
-                    WHEN aus.total_seconds > ts.avg_user_usage_seconds THEN 'Heavy User'
-                    WHEN aus.total_seconds > ts.avg_user_usage_seconds - ts.stddev_user_usage_seconds THEN 'Regular User'
-                    ELSE 'Light User'
-                END as user_category,
-                CASE 
-                    WHEN aus.session_count >= 50 THEN 'Very High'
-                    WHEN aus.session_count >= 20 THEN 'High'
-                    WHEN aus.session_count >= 10 THEN 'Medium'
-                    WHEN aus.session_count >= 5 THEN 'Low'
-                    ELSE 'Very Low'
-                END as engagement_level
-            FROM aggregated_user_stats aus
-            CROSS JOIN total_stats ts
-        )
-        SELECT 
-            user,
-            total_seconds,
-            session_count,
-            avg_session_seconds,
-            min_session_seconds,
-            max_session_seconds,
-            avg_stddev_session_seconds,
-            first_usage_date,
-            last_usage_date,
-            total_active_days,
-            platforms_used,
-            usage_percentage,
-            session_percentage,
-            usage_rank,
-            session_rank,
-            usage_quartile,
-            user_category,
-            engagement_level,
-            grand_total_seconds,
-            grand_total_sessions,
-            total_users,
-            avg_user_usage_seconds,
-            stddev_user_usage_seconds,
-            avg_sessions_per_user,
-            stddev_sessions_per_user
-        FROM user_analysis
-        ORDER BY total_seconds DESC
-        LIMIT ?
-        """
-        
         params.append(limit)
         
         # Execute query
@@ -253,76 +308,77 @@ async def app_users(
                 }
             }
         
-        # Process results
+        # Process results. Unit conversions and per-user ratios are computed
+        # in the query, so each row is copied into the response as is
         users = []
-        grand_total_seconds = results[0][18] if results else 0
-        grand_total_sessions = results[0][19] if results else 0
-        total_users = results[0][20] if results else 0
-        avg_user_usage_seconds = results[0][21] if results else 0
-        stddev_user_usage_seconds = results[0][22] if results else 0
-        avg_sessions_per_user = results[0][23] if results else 0
-        stddev_sessions_per_user = results[0][24] if results else 0
+        totals = results[0]
+        grand_total_seconds = totals["grand_total_seconds"]
+        grand_total_sessions = totals["grand_total_sessions"]
+        total_users = totals["total_users"]
+        avg_user_usage_seconds = totals["avg_user_usage_seconds"]
+        stddev_user_usage_seconds = totals["stddev_user_usage_seconds"]
+        avg_sessions_per_user = totals["avg_sessions_per_user"]
+        stddev_sessions_per_user = totals["stddev_sessions_per_user"]
         
-        for row in results:
-            # Calculate additional metrics
-            usage_span_days = (datetime.strptime(row[8], '%Y-%m-%d') - 
-                             datetime.strptime(row[7], '%Y-%m-%d')).days + 1
-            usage_frequency = round((row[9] / usage_span_days) * 100, 1) if usage_span_days > 0 else 0
-            sessions_per_day = round(row[2] / row[9], 2) if row[9] > 0 else 0
-            
+        # Category and engagement counts are tallied in the same pass
+        category_counts = {"Power User": 0, "Heavy User": 0, "Regular User": 0, "Light User": 0}
+        engagement_counts = {"Very High": 0, "High": 0, "Medium": 0, "Low": 0, "Very Low": 0}
+        cross_platform_count = 0
+        recent_user_count = 0
+        
+        for usage_rank, row in enumerate(results, 1):
+            platforms_used = row["platforms_used"]
             user_data = {
-                "rank": int(row[13]),  # usage_rank
-                "user": row[0],
+                "rank": usage_rank,
+                "user": row["user"],
                 "usage_metrics": {
-                    "total_hours": round(row[1] / 3600, 2),  # total_seconds to hours
-                    "total_minutes": round(row[1] / 60, 2),  # total_seconds to minutes
-                    "usage_percentage": row[11],  # usage_percentage
-                    "usage_quartile": int(row[15]),  # usage_quartile (1=lowest, 4=highest)
-                    "user_category": row[16],  # user_category
-                    "vs_average_usage": round(((row[1] - avg_user_usage_seconds) / avg_user_usage_seconds) * 100, 1) if avg_user_usage_seconds > 0 else 0
+                    "total_hours": row["total_hours"],
+                    "total_minutes": row["total_minutes"],
+                    "usage_percentage": row["usage_percentage"],
+                    "usage_quartile": quartile_from_rank(usage_rank, total_users),  # 1=lowest, 4=highest
+                    "user_category": row["user_category"],
+                    "vs_average_usage": row["vs_average_usage"]
                 },
                 "session_metrics": {
-                    "total_sessions": int(row[2]),
-                    "session_percentage": row[12],  # session_percentage
-                    "session_rank": int(row[14]),  # session_rank
-                    "engagement_level": row[17],  # engagement_level
-                    "avg_session_minutes": round(row[3] / 60, 2),  # avg_session_seconds to minutes
-                    "min_session_minutes": round(row[4] / 60, 2),  # min_session_seconds to minutes
-                    "max_session_minutes": round(row[5] / 60, 2),  # max_session_seconds to minutes
-                    "session_variability": round(row[6] / 60, 2) if row[6] else 0,  # avg_stddev_session_seconds to minutes
-                    "sessions_per_day": sessions_per_day
+                    "total_sessions": row["session_count"],
+                    "session_percentage": row["session_percentage"],
+                    "session_rank": row["session_rank"],
+                    "engagement_level": row["engagement_level"],
+                    "avg_session_minutes": row["avg_session_minutes"],
+                    "min_session_minutes": row["min_session_minutes"],
+                    "max_session_minutes": row["max_session_minutes"],
+                    "session_variability": row["session_variability"],
+                    "sessions_per_day": row["sessions_per_day"]
                 },
                 "platform_metrics": {
-                    "platforms_used": int(row[10]),
-                    "cross_platform": row[10] > 1,
-                    "platform_diversity": "High" if row[10] > 2 else "Medium" if row[10] == 2 else "Single"
+                    "platforms_used": platforms_used,
+                    "cross_platform": platforms_used > 1,
+                    "platform_diversity": "High" if platforms_used > 2 else "Medium" if platforms_used == 2 else "Single"
                 },
                 "timeline": {
-                    "first_usage_date": row[7],
-                    "last_usage_date": row[8],
-                    "active_days": int(row[9]),
-                    "usage_span_days": usage_span_days,
-                    "usage_frequency": usage_frequency,
-                    "days_since_last_use": (datetime.now().date() - datetime.strptime(row[8], '%Y-%m-%d').date()).days
+                    "first_usage_date": row["first_usage_date"],
+                    "last_usage_date": row["last_usage_date"],
+                    "active_days": row["total_active_days"],
+                    "usage_span_days": row["usage_span_days"],
+                    "usage_frequency": row["usage_frequency"],
+                    "days_since_last_use": row["days_since_last_use"]
                 }
             }
             users.append(user_data)
+            category_counts[row["user_category"]] += 1
+            engagement_counts[row["engagement_level"]] += 1
+            if platforms_used > 1:
+                cross_platform_count += 1
+            if row["days_since_last_use"] <= 7:
+                recent_user_count += 1
         
         # Generate insights
         total_usage_hours = round(grand_total_seconds / 3600, 2)
         
-        # User category analysis
-        power_users = [user for user in users if user['usage_metrics']['user_category'] == 'Power User']
-        heavy_users = [user for user in users if user['usage_metrics']['user_category'] == 'Heavy User']
-        regular_users = [user for user in users if user['usage_metrics']['user_category'] == 'Regular User']
-        light_users = [user for user in users if user['usage_metrics']['user_category'] == 'Light User']
-        
-        # Engagement level analysis
-        very_high_engagement = [user for user in users if user['session_metrics']['engagement_level'] == 'Very High']
-        high_engagement = [user for user in users if user['session_metrics']['engagement_level'] == 'High']
-        medium_engagement = [user for user in users if user['session_metrics']['engagement_level'] == 'Medium']
-        low_engagement = [user for user in users if user['session_metrics']['engagement_level'] == 'Low']
-        very_low_engagement = [user for user in users if user['session_metrics']['engagement_level'] == 'Very Low']
+        power_user_count = category_counts["Power User"]
+        heavy_user_count = category_counts["Heavy User"]
+        regular_user_count = category_counts["Regular User"]
+        light_user_count = category_counts["Light User"]
         
         insights = {
             "summary": f"Analysis of {len(users)} users who have used '{application_name}'",
@@ -335,57 +391,54 @@ async def app_users(
                 "average_usage_per_user_hours": round(avg_user_usage_seconds / 3600, 2),
                 "average_sessions_per_user": round(avg_sessions_per_user, 1),
                 "user_categories": {
-                    "power_users": len(power_users),
-                    "heavy_users": len(heavy_users),
-                    "regular_users": len(regular_users),
-                    "light_users": len(light_users)
+                    "power_users": power_user_count,
+                    "heavy_users": heavy_user_count,
+                    "regular_users": regular_user_count,
+                    "light_users": light_user_count
                 },
                 "engagement_levels": {
-                    "very_high": len(very_high_engagement),
-                    "high": len(high_engagement),
-                    "medium": len(medium_engagement),
-                    "low": len(low_engagement),
-                    "very_low": len(very_low_engagement)
+                    "very_high": engagement_counts["Very High"],
+                    "high": engagement_counts["High"],
+                    "medium": engagement_counts["Medium"],
+                    "low": engagement_counts["Low"],
+                    "very_low": engagement_counts["Very Low"]
                 }
             },
             "recommendations": []
         }
         
-        if users:
-            top_user = users[0]
-            insights["key_findings"].extend([
-                f"Top user '{top_user['user']}' has {top_user['usage_metrics']['total_hours']} hours ({top_user['usage_metrics']['usage_percentage']}% of total usage)",
-                f"Top user has {top_user['session_metrics']['total_sessions']} sessions with {top_user['session_metrics']['avg_session_minutes']} minutes average session length",
-                f"User distribution: {len(power_users)} power users, {len(heavy_users)} heavy users, {len(regular_users)} regular users, {len(light_users)} light users"
-            ])
+        top_user = users[0]
+        insights["key_findings"].extend([
+            f"Top user '{top_user['user']}' has {top_user['usage_metrics']['total_hours']} hours ({top_user['usage_metrics']['usage_percentage']}% of total usage)",
+            f"Top user has {top_user['session_metrics']['total_sessions']} sessions with {top_user['session_metrics']['avg_session_minutes']} minutes average session length",
+            f"User distribution: {power_user_count} power users, {heavy_user_count} heavy users, {regular_user_count} regular users, {light_user_count} light users"
+        ])
+        
+        # Usage concentration analysis
+        if len(users) >= 5:
+            top_5_percentage = sum(user['usage_metrics']['usage_percentage'] for user in users[:5])
+            insights["key_findings"].append(f"Top 5 users account for {round(top_5_percentage, 1)}% of total application usage")
             
-            # Usage concentration analysis
-            if len(users) >= 5:
-                top_5_percentage = sum(user['usage_metrics']['usage_percentage'] for user in users[:5])
-                insights["key_findings"].append(f"Top 5 users account for {round(top_5_percentage, 1)}% of total application usage")
-                
-                if top_5_percentage > 70:
-                    insights["recommendations"].append("High usage concentration - consider strategies to engage more users")
-                elif top_5_percentage < 40:
-                    insights["recommendations"].append("Well-distributed usage across users - good user engagement balance")
+            if top_5_percentage > 70:
+                insights["recommendations"].append("High usage concentration - consider strategies to engage more users")
+            elif top_5_percentage < 40:
+                insights["recommendations"].append("Well-distributed usage across users - good user engagement balance")
         
         # Engagement recommendations
-        if power_users or heavy_users:
-            total_engaged = len(power_users) + len(heavy_users)
+        if power_user_count or heavy_user_count:
+            total_engaged = power_user_count + heavy_user_count
             insights["recommendations"].append(f"Leverage {total_engaged} highly engaged users as advocates and feedback sources")
         
-        if light_users:
-            insights["recommendations"].append(f"Develop engagement strategies for {len(light_users)} light users to increase adoption")
+        if light_user_count:
+            insights["recommendations"].append(f"Develop engagement strategies for {light_user_count} light users to increase adoption")
         
         # Platform diversity recommendations
-        cross_platform_users = [user for user in users if user['platform_metrics']['cross_platform']]
-        if cross_platform_users:
-            insights["recommendations"].append(f"Study {len(cross_platform_users)} cross-platform users for insights on multi-platform workflows")
+        if cross_platform_count:
+            insights["recommendations"].append(f"Study {cross_platform_count} cross-platform users for insights on multi-platform workflows")
         
         # Retention recommendations
-        recent_users = [user for user in users if user['timeline']['days_since_last_use'] <= 7]
-        if recent_users:
-            insights["recommendations"].append(f"Focus retention efforts on {len(recent_users)} recently active users")
+        if recent_user_count:
+            insights["recommendations"].append(f"Focus retention efforts on {recent_user_count} recently active users")
         
         return {
             "status": "success",